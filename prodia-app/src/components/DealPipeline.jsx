@@ -162,9 +162,34 @@ function DealDrawer({ deal, onClose, onSave, onDelete, engineers }) {
   const [saving, setSaving] = useState(false);
   const [deleting, setDeleting] = useState(false);
   const [addingActivity, setAddingActivity] = useState(false);
+  // 活動履歴の追加読み込み（案件データには最新数件のみ含まれる）
+  const [activityPage, setActivityPage] = useState(null);
+  const [loadingActivities, setLoadingActivities] = useState(false);
 
   const set = (k, v) => setForm((f) => ({ ...f, [k]: v }));
 
+  const activities = activityPage ? activityPage.results : (form.activities || []);
+  const hasMoreActivities = activityPage
+    ? !!activityPage.next
+    : (form.activity_count || 0) > (form.activities || []).length;
+
+  const handleLoadMoreActivities = async () => {
+    setLoadingActivities(true);
+    try {
+      const url = activityPage?.next || `${API_BASE}/deals/${deal.id}/activities/`;
+      const res = await fetch(url);
+      if (res.ok) {
+        const data = await res.json();
+        setActivityPage((prev) => ({
+          results: [...(prev?.results || []), ...data.results],
+          next: data.next,
+        }));
+      }
+    } finally {
+      setLoadingActivities(false);
+    }
+  };
+
   const handleSave = async () => {
     setSaving(true);
     await onSave(form);
@@ -194,6 +219,7 @@ function DealDrawer({ deal, onClose, onSave, onDelete, engineers }) {
       if (res.ok) {
         const updated = await fetch(`${API_BASE}/deals/${deal.id}/`).then((r) => r.json());
         setForm(updated);
+        setActivityPage(null);
         setActivityText("");
       }
     } finally {
@@ -385,10 +411,10 @@ function DealDrawer({ deal, onClose, onSave, onDelete, engineers }) {
 
             {/* 履歴一覧 */}
             <div className="space-y-2">
-              {(form.activities || []).length === 0 && (
+              {activities.length === 0 && (
                 <p className="text-xs text-slate-300 text-center py-4">活動記録がありません</p>
               )}
-              {(form.activities || []).map((act) => (
+              {activities.map((act) => (
                 <div key={act.id} className="flex gap-3 text-sm">
                   <div className="w-7 h-7 rounded-lg bg-slate-100 flex items-center justify-center flex-shrink-0 mt-0.5">
                     <i className={`${ACTIVITY_ICONS[act.activity_type] || "fas fa-thumbtack"} text-slate-500 text-xs`}></i>
@@ -401,6 +427,15 @@ function DealDrawer({ deal, onClose, onSave, onDelete, engineers }) {
                   </div>
                 </div>
               ))}
+              {hasMoreActivities && (
+                <button
+                  onClick={handleLoadMoreActivities}
+                  disabled={loadingActivities}
+                  className="w-full text-xs text-slate-500 hover:text-slate-700 py-2 disabled:opacity-50"
+                >
+                  {loadingActivities ? "読み込み中..." : `さらに表示（全${form.activity_count}件）`}
+                </button>
+              )}
             </div>
           </div>
         </div>
@@ -872,7 +907,7 @@ export default function DealPipeline() {
 
   const fetchPipeline = async () => {
     try {
-      const res = await fetch(`${API_BASE}/deals/pipeline/`);
+      const res = await fetch(`${API_BASE}/deals/pipeline/?summary=1`);
       if (res.ok) setPipeline(await res.json());
     } catch (e) {
       console.error("パイプライン取得エラー:", e);
@@ -881,6 +916,20 @@ export default function DealPipeline() {
     }
   };
 
+  // かんばんカードは活動履歴を含まないため、詳細は開くときに取得する
+  const openDeal = async (deal) => {
+    try {
+      const res = await fetch(`${API_BASE}/deals/${deal.id}/`);
+      if (res.ok) {
+        setSelectedDeal(await res.json());
+        return;
+      }
+    } catch (e) {
+      console.error("案件詳細取得エラー:", e);
+    }
+    setSelectedDeal(deal);
+  };
+
   const fetchAllDeals = async () => {
     try {
       const res = await fetch(`${API_BASE}/deals/`);
@@ -1057,7 +1106,7 @@ export default function DealPipeline() {
                   key={stage.key}
                   stage={stage}
                   data={pipeline[stage.key]}
-                  onClickCard={setSelectedDeal}
+                  onClickCard={openDeal}
                   onDragStart={handleDragStart}
                   onDrop={handleDrop}
                   onDragOver={handleDragOver}
@@ -448,7 +448,7 @@ export default function PPSalesProgress() {
 
   // IDRエンジニア名リスト取得
   useEffect(() => {
-    apiFetch('/engineers/')
+    apiFetch('/engineers/?fields=id,name')
       .then(res => res.json())
       .then(data => {
         const list = Array.isArray(data) ? data : (data.results || []);
@@ -306,24 +306,33 @@ function CallListTab({ currentPlanner, onRecordSaved }) {
   const [statusFilter, setStatusFilter] = useState('all'); // all / uncalled / called
   const [callingCompany, setCallingCompany] = useState(null);
   const [currentPage, setCurrentPage] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
   const PAGE_SIZE = 15;
 
+  // 検索・絞り込み・ページングはサーバー側で実行
   const fetchCompanies = useCallback(async () => {
     setLoading(true);
     try {
-      const params = new URLSearchParams({ status: statusFilter });
+      const params = new URLSearchParams({ status: statusFilter, page: currentPage, page_size: PAGE_SIZE });
       if (search) params.append('search', search);
       const res = await fetch(`${API_BASE}/companies/teleapo-status/?${params}`);
+      if (res.status === 404 && currentPage > 1) {
+        setCurrentPage(1);
+        return;
+      }
       const data = await res.json();
-      setCompanies(Array.isArray(data) ? data : []);
+      setCompanies(Array.isArray(data.results) ? data.results : []);
+      setTotalCount(data.count || 0);
     } catch {
       setCompanies([]);
+      setTotalCount(0);
     } finally {
       setLoading(false);
     }
-  }, [statusFilter, search]);
+  }, [statusFilter, search, currentPage]);
 
-  useEffect(() => { fetchCompanies(); setCurrentPage(1); }, [fetchCompanies]);
+  useEffect(() => { setCurrentPage(1); }, [statusFilter, search]);
+  useEffect(() => { fetchCompanies(); }, [fetchCompanies]);
 
   const handleSaved = (saved) => {
     setCallingCompany(null);
@@ -331,9 +340,9 @@ function CallListTab({ currentPlanner, onRecordSaved }) {
     onRecordSaved(saved);
   };
 
-  const totalPages = Math.max(1, Math.ceil(companies.length / PAGE_SIZE));
+  const totalPages = Math.max(1, Math.ceil(totalCount / PAGE_SIZE));
   const safePage = Math.min(currentPage, totalPages);
-  const paged = companies.slice((safePage - 1) * PAGE_SIZE, safePage * PAGE_SIZE);
+  const paged = companies;
 
   const RESULT_LABEL_MAP = Object.fromEntries(
     Object.entries(RESULT_CONFIG).map(([k, v]) => [k, v])
@@ -372,7 +381,7 @@ function CallListTab({ currentPlanner, onRecordSaved }) {
             </button>
           ))}
         </div>
-        <span className="text-xs text-slate-400 ml-auto">{companies.length}社</span>
+        <span className="text-xs text-slate-400 ml-auto">{totalCount}社</span>
       </div>
 
       {/* テーブル */}
@@ -461,7 +470,7 @@ function CallListTab({ currentPlanner, onRecordSaved }) {
             {totalPages > 1 && (
               <div className="flex items-center justify-between px-4 py-3 bg-slate-50 border-t border-slate-100">
                 <span className="text-xs text-slate-400">
-                  {(safePage - 1) * PAGE_SIZE + 1}–{Math.min(safePage * PAGE_SIZE, companies.length)}社 / 全{companies.length}社
+                  {(safePage - 1) * PAGE_SIZE + 1}–{Math.min(safePage * PAGE_SIZE, totalCount)}社 / 全{totalCount}社
                 </span>
                 <div className="flex items-center gap-1">
                   <button onClick={() => setCurrentPage(p => Math.max(1, p - 1))} disabled={safePage === 1}
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from "react";
+import React, { useEffect, useState, useMemo, useRef } from "react";
 import { businessDaysUntil } from "../utils/businessDays";
 
 const API_BASE = "/api";
@@ -744,27 +744,33 @@ function fmtYM(ym) {
   return `${y}年${Number(m)}月`;
 }
 
-function MonthlyProjectReport({ idrEngineers, partnerEngineers }) {
+function MonthlyProjectReport() {
   const today = new Date();
   const currentYM = `${today.getFullYear()}-${String(today.getMonth() + 1).padStart(2, "0")}`;
 
-  const autoIdr   = idrEngineers.filter(e => e.engineer_status === "アサイン済").length;
-  const autoBp    = partnerEngineers.filter(e => ["active", "upcoming"].includes(e.status)).length;
-  const autoTotal = autoIdr + autoBp;
-
   const [reports, setReports] = useState([]);
+  const [counts, setCounts] = useState({ idr_count: 0, bp_count: 0, total_count: 0 });
   const [loading, setLoading] = useState(true);
   const [editingYM, setEditingYM] = useState(null);
   const [editForm, setEditForm] = useState({});
   const [showAddModal, setShowAddModal] = useState(false);
   const [addForm, setAddForm] = useState({ year_month: "", idr_count: "", bp_count: "", note: "" });
 
-  // 一覧取得
+  // 今月の件数はサーバーで算出（IDR アサイン済 / BP active・upcoming）
+  const autoIdr   = counts.idr_count;
+  const autoBp    = counts.bp_count;
+  const autoTotal = counts.total_count;
+
+  // 一覧取得（今月の自動算出行はサーバー側で最新件数に差し替え済み）
   const fetchReports = async () => {
     try {
-      const res = await fetch(`${API_BASE}/monthly-reports/`);
-      const data = await res.json();
+      const [reportRes, countRes] = await Promise.all([
+        fetch(`${API_BASE}/monthly-reports/`),
+        fetch(`${API_BASE}/monthly-reports/current_counts/`),
+      ]);
+      const data = await reportRes.json();
       setReports(Array.isArray(data) ? data : (data.results || []));
+      if (countRes.ok) setCounts(await countRes.json());
     } catch {
       setReports([]);
     } finally {
@@ -772,40 +778,10 @@ function MonthlyProjectReport({ idrEngineers, partnerEngineers }) {
     }
   };
 
-  // 初期表示：今月レコードをDB上で確実に作成・同期
   useEffect(() => {
-    const init = async () => {
-      try {
-        await fetch(`${API_BASE}/monthly-reports/ensure_current/`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ idr_count: autoIdr, bp_count: autoBp }),
-        });
-      } catch { /* ignore */ }
-      fetchReports();
-    };
-    init();
+    fetchReports();
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
-  // エンジニアデータ変更時に今月の自動算出を更新
-  useEffect(() => {
-    const syncCurrent = async () => {
-      const cur = reports.find(r => r.year_month === currentYM);
-      if (!cur || !cur.is_auto || cur.locked) return;
-      try {
-        await fetch(`${API_BASE}/monthly-reports/${cur.id}/`, {
-          method: "PATCH",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ idr_count: autoIdr, bp_count: autoBp, is_auto: true }),
-        });
-        setReports(prev => prev.map(r =>
-          r.id === cur.id ? { ...r, idr_count: autoIdr, bp_count: autoBp, total_count: autoIdr + autoBp } : r
-        ));
-      } catch { /* ignore */ }
-    };
-    if (reports.length > 0) syncCurrent();
-  }, [autoIdr, autoBp]); // eslint-disable-line react-hooks/exhaustive-deps
-
   // 降順ソート＋純増計算
   const sorted = [...reports].sort((a, b) => b.year_month.localeCompare(a.year_month));
   const withNet = sorted.map((r, i) => {
@@ -822,6 +798,13 @@ function MonthlyProjectReport({ idrEngineers, partnerEngineers }) {
   const chartData = [...withNet].reverse().slice(-12);
   const maxVal    = Math.max(...chartData.map(r => r.total_count), 1);
 
+  // 今月の行が未作成（月替わり後の定期実行前で id が null）の場合は、更新前に作成して id を得る
+  const reportId = async (r) => {
+    if (r.id != null) return r.id;
+    const res = await fetch(`${API_BASE}/monthly-reports/ensure_current/`, { method: "POST" });
+    return res.ok ? (await res.json()).id : null;
+  };
+
   const handleEdit = (r) => {
     setEditingYM(r.year_month);
     setEditForm({ idr_count: r.idr_count, bp_count: r.bp_count, note: r.note || "" });
@@ -833,14 +816,16 @@ function MonthlyProjectReport({ idrEngineers, partnerEngineers }) {
     const idr = Math.max(Number(editForm.idr_count) || 0, 0);
     const bp  = Math.max(Number(editForm.bp_count)  || 0, 0);
     try {
-      const res = await fetch(`${API_BASE}/monthly-reports/${r.id}/`, {
+      const id = await reportId(r);
+      if (id == null) return;
+      const res = await fetch(`${API_BASE}/monthly-reports/${id}/`, {
         method: "PATCH",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ idr_count: idr, bp_count: bp, note: editForm.note, is_auto: false }),
       });
       if (res.ok) {
         const saved = await res.json();
-        setReports(prev => prev.map(x => x.id === saved.id ? saved : x));
+        setReports(prev => prev.map(x => x.year_month === saved.year_month ? saved : x));
       }
     } catch { /* ignore */ }
     setEditingYM(null);
@@ -850,14 +835,16 @@ function MonthlyProjectReport({ idrEngineers, partnerEngineers }) {
     const r = reports.find(x => x.year_month === ym);
     if (!r) return;
     try {
-      const res = await fetch(`${API_BASE}/monthly-reports/${r.id}/`, {
+      const id = await reportId(r);
+      if (id == null) return;
+      const res = await fetch(`${API_BASE}/monthly-reports/${id}/`, {
         method: "PATCH",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ locked: true, is_auto: false }),
       });
       if (res.ok) {
         const saved = await res.json();
-        setReports(prev => prev.map(x => x.id === saved.id ? saved : x));
+        setReports(prev => prev.map(x => x.year_month === saved.year_month ? saved : x));
       }
     } catch { /* ignore */ }
   };
@@ -866,14 +853,16 @@ function MonthlyProjectReport({ idrEngineers, partnerEngineers }) {
     const r = reports.find(x => x.year_month === ym);
     if (!r) return;
     try {
-      const res = await fetch(`${API_BASE}/monthly-reports/${r.id}/`, {
+      const id = await reportId(r);
+      if (id == null) return;
+      const res = await fetch(`${API_BASE}/monthly-reports/${id}/`, {
         method: "PATCH",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ locked: false }),
       });
       if (res.ok) {
         const saved = await res.json();
-        setReports(prev => prev.map(x => x.id === saved.id ? saved : x));
+        setReports(prev => prev.map(x => x.year_month === saved.year_month ? saved : x));
       }
     } catch { /* ignore */ }
   };
@@ -1139,11 +1128,27 @@ export default function UtilizationDashboard() {
     }
   };
 
+  // 定期ポーリングは集計サマリーのみ取得し、件数・最終更新日時が変わった時だけ一覧を再取得
+  const summaryKey = useRef(null);
+  const pollSummary = async () => {
+    try {
+      const res = await fetch(`${API_BASE}/utilization/summary/`);
+      if (!res.ok) return;
+      const s = await res.json();
+      const key = [s.date, s.idr.total, s.idr.last_updated_at, s.bp.total, s.bp.last_updated_at].join("|");
+      if (summaryKey.current !== null && summaryKey.current !== key) fetchAll();
+      summaryKey.current = key;
+    } catch (e) {
+      console.error("サマリー取得エラー:", e);
+    }
+  };
+
   useEffect(() => {
     fetchAll();
-    const iv = setInterval(fetchAll, 5 * 60 * 1000);
+    pollSummary();
+    const iv = setInterval(pollSummary, 5 * 60 * 1000);
     return () => clearInterval(iv);
-  }, []);
+  }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
   // ─── IDR 集計 ─────────────────────────────
   const idrStats = useMemo(() => {
@@ -1459,7 +1464,7 @@ export default function UtilizationDashboard() {
 
         {/* ─────────── 月次レポートタブ ─────────── */}
         {engineerTab === "monthly" && (
-          <MonthlyProjectReport idrEngineers={engineers} partnerEngineers={partners} />
+          <MonthlyProjectReport />
         )}
 
       </div>
@@ -27,6 +27,11 @@ class EngineerAdmin(admin.ModelAdmin):
             if form.is_valid():
                 created, updated = form.save()
                 self.message_user(request, f"{created}件新規登録、{updated}件更新しました。", messages.SUCCESS)
+                if len(form.chunk_results) > 1:
+                    detail = ' / '.join(
+                        f"#{i}: 新規{c}件・更新{u}件" for i, (c, u) in enumerate(form.chunk_results, 1)
+                    )
+                    self.message_user(request, f"チャンク別内訳 {detail}", messages.INFO)
                 return redirect('..')
         else:
             form = EngineerUploadForm()
@@ -1,30 +1,76 @@
 import csv
+import re
 from io import TextIOWrapper
+from itertools import islice
 from django import forms
 from .models import Engineer
 
+# 1回の INSERT ... ON CONFLICT で書き込む行数
+CHUNK_SIZE = 1000
+
+UPSERT_FIELDS = ['position', 'project_name', 'planner', 'skills', 'engineer_status', 'phase']
+
+# スキル・フェーズの区切り文字（例: "Python/Django", "要件定義,基本設計"）
+LIST_SEPARATOR = re.compile(r'[,/、]')
+
+
+def parse_list(value):
+    """区切り文字で分割してリストに変換"""
+    if not value:
+        return []
+    return [v.strip() for v in LIST_SEPARATOR.split(value) if v.strip()]
+
+
 class EngineerUploadForm(forms.Form):
     file = forms.FileField(label='CSVファイルを選択')
 
+    def _iter_chunks(self, reader):
+        while True:
+            chunk = list(islice(reader, CHUNK_SIZE))
+            if not chunk:
+                return
+            yield chunk
+
+    def _upsert_chunk(self, rows):
+        """チャンク内の行を名前で重複排除し、1回の INSERT ... ON CONFLICT で書き込む"""
+        engineers = {}
+        for row in rows:
+            name = (row.get('name') or '').strip()
+            if not name:
+                continue
+            engineers[name] = Engineer(
+                name=name,
+                position=row.get('position') or None,
+                project_name=row.get('project_name') or '',
+                planner=row.get('planner') or '',
+                skills=parse_list(row.get('skills')),
+                engineer_status=row.get('engineer_status') or '',
+                phase=parse_list(row.get('phase')),
+            )
+        if not engineers:
+            return 0, 0
+
+        existing = set(Engineer.objects.filter(name__in=engineers).values_list('name', flat=True))
+        Engineer.objects.bulk_create(
+            engineers.values(),
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=UPSERT_FIELDS,
+        )
+        updated = len(existing)
+        return len(engineers) - updated, updated
+
     def save(self):
+        """
+        CSVをチャンク単位で読み込み、チャンクごとに upsert する。
+        チャンクごとの (新規件数, 更新件数) は self.chunk_results に残す。
+        """
         file = self.cleaned_data['file']
-        decoded_file = TextIOWrapper(file, encoding='utf-8')
+        decoded_file = TextIOWrapper(file, encoding='utf-8-sig')
         reader = csv.DictReader(decoded_file)
-        created, updated = 0, 0
-        for row in reader:
-            obj, is_created = Engineer.objects.update_or_create(
-                name=row.get('name'),
-                defaults={
-                    'position': row.get('position'),
-                    'project_name': row.get('project_name'),
-                    'planner': row.get('planner'),
-                    'skills': row.get('skills'),
-                    'engineer_status': row.get('engineer_status'),
-                    'phase': row.get('phase'),
-                }
-            )
-            if is_created:
-                created += 1
-            else:
-                updated += 1
+        self.chunk_results = []
+        for chunk in self._iter_chunks(reader):
+            self.chunk_results.append(self._upsert_chunk(chunk))
+        created = sum(c for c, _ in self.chunk_results)
+        updated = sum(u for _, u in self.chunk_results)
         return created, updated
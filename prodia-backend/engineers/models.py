@@ -3,7 +3,7 @@ from django.utils import timezone
 
 
 class Engineer(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)  # CSVアップロードの upsert キー
     position = models.CharField(max_length=50, blank=True, null=True)  # 役職（空欄可）
     project_name = models.CharField(max_length=100)
     planner = models.CharField(max_length=100)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class EngineersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'engineers'
+
+    def ready(self):
+        from . import signals  # noqa: F401  シグナルハンドラ登録
@@ -0,0 +1,217 @@
+"""
+売上予測（モンテカルロシミュレーション）
+
+アサイン済エンジニアの月単価・稼働率・プロジェクト終了予定日を NumPy 配列に読み込み、
+契約更新ごとの継続／離脱と単価改定を（シミュレーション数 × エンジニア数）の行列で
+月単位にベクトル演算する。月次・四半期・年次の売上分布から
+楽観（90パーセンタイル）・現実（中央値）・悲観（10パーセンタイル）を RevenueForecast に保存する。
+"""
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from .models import Engineer, RevenueForecast
+
+IDR_ASSIGNED = 'アサイン済'
+
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 36
+DEFAULT_SIMULATIONS = 10000
+MAX_SIMULATIONS = 50000
+
+# 契約更新サイクル（終了予定日の無い契約・延長後の次回更新までの月数）
+RENEWAL_CYCLE_MONTHS = 3
+# 更新時の単価改定率のばらつき（標準偏差）
+RATE_INCREASE_STD = 0.02
+
+SCENARIO_PERCENTILES = {
+    'optimistic': 90,
+    'realistic': 50,
+    'pessimistic': 10,
+}
+
+
+def _add_months(d, months):
+    total = d.year * 12 + d.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _month_index(base, d):
+    return (d.year - base.year) * 12 + (d.month - base.month)
+
+
+def load_engineer_arrays(start_month):
+    """
+    アサイン済エンジニアを配列化
+    返り値: (monthly_rate, working_rate, first_renewal)
+      first_renewal: 最初の更新判定を行う月のインデックス（start_month = 0）
+    """
+    rows = list(
+        Engineer.objects.filter(engineer_status=IDR_ASSIGNED, monthly_rate__isnull=False)
+        .values_list('monthly_rate', 'working_rate', 'project_end_date')
+    )
+    n = len(rows)
+    monthly_rate = np.empty(n, dtype=np.float64)
+    working_rate = np.empty(n, dtype=np.float64)
+    first_renewal = np.empty(n, dtype=np.int32)
+    for i, (rate, working, end_date) in enumerate(rows):
+        monthly_rate[i] = float(rate)
+        working_rate[i] = float(working if working is not None else 1)
+        if end_date is None:
+            first_renewal[i] = RENEWAL_CYCLE_MONTHS
+        else:
+            # 終了月の翌月初に更新判定（終了済みは初月に判定）
+            first_renewal[i] = max(_month_index(start_month, end_date) + 1, 0)
+    return monthly_rate, working_rate, first_renewal
+
+
+def simulate(monthly_rate, working_rate, first_renewal, months, simulations,
+             continuation_rate, rate_increase, new_hires=0, seed=None):
+    """
+    モンテカルロシミュレーション本体
+
+    new_hires は12ヶ月あたりの採用数。期間内に均等に参画し、既存エンジニアの中央単価で稼働する。
+    返り値: (revenue, active) いずれも shape = (simulations, months)
+    """
+    rng = np.random.default_rng(seed)
+
+    hire_count = int(round(new_hires * months / 12))
+    if hire_count:
+        median_rate = float(np.median(monthly_rate)) if monthly_rate.size else 0.0
+        join = np.linspace(0, months - 1, hire_count).round().astype(np.int32)
+        monthly_rate = np.concatenate([monthly_rate, np.full(hire_count, median_rate)])
+        working_rate = np.concatenate([working_rate, np.ones(hire_count)])
+        first_renewal = np.concatenate([first_renewal, join + RENEWAL_CYCLE_MONTHS])
+        start = np.concatenate([np.zeros(monthly_rate.size - hire_count, dtype=np.int32), join])
+    else:
+        start = np.zeros(monthly_rate.size, dtype=np.int32)
+
+    # 継続中の契約は first_renewal + k × RENEWAL_CYCLE_MONTHS で更新されるため、月ごとの更新対象は
+    # 列（エンジニア）単位で決まる。更新周期の位相 → 初回更新月の順に列を並べ替えておくと、
+    # 各月の更新対象は連続した列範囲になり、その範囲だけをビューのまま抽選・更新できる。
+    # 離脱したセルは単価 0 として扱う（生存フラグの行列を持たない）。
+    phase = first_renewal.astype(np.int32) % RENEWAL_CYCLE_MONTHS
+    order = np.lexsort((first_renewal, phase))
+    rate_per_engineer = (monthly_rate * working_rate)[order].astype(np.float32)
+    first_renewal, phase, start = first_renewal[order], phase[order], start[order]
+    phase_start = np.searchsorted(phase, np.arange(RENEWAL_CYCLE_MONTHS + 1))
+
+    rate = np.broadcast_to(rate_per_engineer, (simulations, rate_per_engineer.size)).copy()
+    ones = np.ones(rate.shape[1], dtype=np.float32)
+    current = np.zeros(simulations, dtype=np.float64)   # 当月の売上合計
+    count = np.zeros(simulations, dtype=np.int32)       # 当月の稼働人数
+
+    revenue = np.zeros((simulations, months), dtype=np.float64)
+    active = np.zeros((simulations, months), dtype=np.int32)
+
+    # 単価改定率は継続判定の一様乱数を再利用し、平均 rate_increase・標準偏差 RATE_INCREASE_STD の一様分布とする
+    spread = np.float32(RATE_INCREASE_STD * np.sqrt(12))
+    base_factor = np.float32(1 + rate_increase - spread / 2)
+    draw_scale = np.float32(spread / max(continuation_rate, 1e-9))
+
+    for t in range(months):
+        joining = np.flatnonzero(start == t)
+        if joining.size:
+            current += rate[:, joining] @ ones[:joining.size]
+            count += joining.size
+
+        p = t % RENEWAL_CYCLE_MONTHS
+        lo = phase_start[p]
+        hi = lo + np.searchsorted(first_renewal[lo:phase_start[p + 1]], t, side='right')
+        if hi > lo:
+            due = rate[:, lo:hi]
+            draw = rng.random(due.shape, dtype=np.float32)
+            continued = draw < continuation_rate
+            factor = np.where(continued, np.maximum(base_factor + draw * draw_scale, np.float32(0.9)), np.float32(0))
+            before = due @ ones[:hi - lo]
+            count -= np.count_nonzero((due > 0) & ~continued, axis=1).astype(np.int32)
+            due *= factor
+            current += due @ ones[:hi - lo] - before
+
+        revenue[:, t] = current
+        active[:, t] = count
+
+    return revenue, active
+
+
+def _period_sums(values, size):
+    """月次配列を size ヶ月ごとに合計（端数月は切り捨て）"""
+    periods = values.shape[1] // size
+    if not periods:
+        return values[:, :0]
+    return values[:, :periods * size].reshape(values.shape[0], periods, size).sum(axis=2)
+
+
+def _period_means(values, size):
+    periods = values.shape[1] // size
+    if not periods:
+        return values[:, :0]
+    return values[:, :periods * size].reshape(values.shape[0], periods, size).mean(axis=2)
+
+
+def run_forecast(created_by, months=DEFAULT_MONTHS, simulations=DEFAULT_SIMULATIONS,
+                 continuation_rate=0.85, rate_increase=0.0, new_hires=0,
+                 seed=None, start_month=None):
+    """
+    売上予測を実行して RevenueForecast に保存（同一期間・シナリオは上書き）
+    返り値: 保存したシナリオ別の予測値
+    """
+    start_month = (start_month or date.today()).replace(day=1)
+    monthly_rate, working_rate, first_renewal = load_engineer_arrays(start_month)
+    revenue, active = simulate(
+        monthly_rate, working_rate, first_renewal, months, simulations,
+        continuation_rate, rate_increase, new_hires, seed,
+    )
+    avg_working_rate = float(working_rate.mean()) if working_rate.size else 1.0
+
+    periods = [('monthly', 1), ('quarterly', 3), ('annual', 12)]
+    percentiles = list(SCENARIO_PERCENTILES.values())
+    records = []
+    for forecast_type, size in periods:
+        revenue_p = np.percentile(_period_sums(revenue, size), percentiles, axis=0)
+        active_p = np.percentile(_period_means(active, size), percentiles, axis=0)
+        for j, scenario in enumerate(SCENARIO_PERCENTILES):
+            for k in range(revenue_p.shape[1]):
+                total = revenue_p[j, k]
+                count = int(round(active_p[j, k]))
+                monthly_total = total / size
+                records.append(RevenueForecast(
+                    forecast_date=_add_months(start_month, k * size),
+                    forecast_type=forecast_type,
+                    scenario=scenario,
+                    total_revenue=Decimal(int(round(total))),
+                    active_engineers_count=count,
+                    average_monthly_rate=Decimal(int(round(monthly_total / count))) if count else Decimal(0),
+                    average_working_rate=Decimal(f'{avg_working_rate:.2f}'),
+                    new_hires_assumption=new_hires,
+                    rate_increase_assumption=Decimal(f'{rate_increase:.2f}'),
+                    project_continuation_rate=Decimal(f'{continuation_rate:.2f}'),
+                    created_by=created_by,
+                ))
+
+    with transaction.atomic():
+        RevenueForecast.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['forecast_date', 'forecast_type', 'scenario'],
+            update_fields=[
+                'total_revenue', 'active_engineers_count', 'average_monthly_rate',
+                'average_working_rate', 'new_hires_assumption', 'rate_increase_assumption',
+                'project_continuation_rate', 'created_by', 'updated_at',
+            ],
+        )
+
+    return {
+        'start_month': start_month.isoformat(),
+        'months': months,
+        'simulations': simulations,
+        'engineers': int(monthly_rate.size),
+        'saved': len(records),
+        'monthly': {
+            scenario: [r.total_revenue for r in records
+                       if r.forecast_type == 'monthly' and r.scenario == scenario]
+            for scenario in SCENARIO_PERCENTILES
+        },
+    }
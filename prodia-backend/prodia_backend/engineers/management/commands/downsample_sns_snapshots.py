@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from engineers.sns_snapshots import HOURLY_RETENTION, RAW_RETENTION, downsample
+
+
+class Command(BaseCommand):
+    help = (
+        f'SNS指標スナップショットを間引く（{RAW_RETENTION.days}日より前は1時間ごと、'
+        f'{HOURLY_RETENTION.days}日より前は1日ごとの最終値のみ残す）'
+    )
+
+    def handle(self, *args, **options):
+        result = downsample()
+        for unit, counts in result.items():
+            self.stdout.write(f"  {unit}: {counts['kept']}件を残し {counts['removed']}件を削除")
+        self.stdout.write(self.style.SUCCESS('間引きが完了しました'))
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from engineers.mixins import DELETED_RECORD_RETENTION
+from engineers.models import DeletedRecord
+
+
+class Command(BaseCommand):
+    help = (
+        f'保持期間（既定 {DELETED_RECORD_RETENTION.days}日）より古い削除記録（DeletedRecord）を削除する。'
+        'それより前の updated_since で差分同期するクライアントは全件を取得し直す必要がある'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DELETED_RECORD_RETENTION.days,
+                            help='保持日数（既定の保持期間と異なる値を指定した場合、差分同期の '
+                                 'full_resync_required 判定とずれる点に注意）')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days < 1:
+            raise CommandError('--days は1以上を指定してください')
+        deleted, _ = DeletedRecord.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted}件の削除記録を削除しました'))
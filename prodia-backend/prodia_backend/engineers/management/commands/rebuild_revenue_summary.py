@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from engineers.revenue import ROLLUP_WINDOW_MONTHS, rebuild
+
+
+class Command(BaseCommand):
+    help = '月次売上サマリー（MonthlyRevenueSummary）を直近 N ヶ月分まとめて再集計する'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=ROLLUP_WINDOW_MONTHS,
+                            help=f'再集計する過去月数（既定 {ROLLUP_WINDOW_MONTHS}）')
+
+    def handle(self, *args, **options):
+        if options['months'] < 0:
+            raise CommandError('--months は0以上で指定してください')
+        rows = rebuild(options['months'])
+        for row in sorted(rows, key=lambda r: r.year_month)[-3:]:
+            self.stdout.write(f"  {row.year_month:%Y-%m}: {row.actual_revenue:,}円 / {row.active_engineers}名")
+        self.stdout.write(self.style.SUCCESS(f'{len(rows)}ヶ月分を再集計しました'))
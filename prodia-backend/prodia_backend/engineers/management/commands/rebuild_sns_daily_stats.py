@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from engineers.sns_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = 'SNS日別集計（SocialMediaDailyStat）を投稿データから全件作り直す'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{count}件の日別集計を作成しました'))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from engineers.forecast import DEFAULT_MONTHS, DEFAULT_SIMULATIONS, MAX_MONTHS, MAX_SIMULATIONS, run_forecast
+from engineers.models import ProdiaUser
+
+
+class Command(BaseCommand):
+    help = 'モンテカルロシミュレーションで売上予測を計算し RevenueForecast に保存する'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=DEFAULT_MONTHS, help=f'予測期間（1〜{MAX_MONTHS}ヶ月）')
+        parser.add_argument('--simulations', type=int, default=DEFAULT_SIMULATIONS, help=f'シミュレーション回数（1〜{MAX_SIMULATIONS}）')
+        parser.add_argument('--continuation-rate', type=float, default=0.85, help='契約更新時の継続率（0〜1）')
+        parser.add_argument('--rate-increase', type=float, default=0.0, help='更新時の単価上昇率（例: 0.03）')
+        parser.add_argument('--new-hires', type=int, default=0, help='12ヶ月あたりの新規採用数')
+        parser.add_argument('--seed', type=int, default=None, help='乱数シード')
+        parser.add_argument('--user', default=None, help='作成者のメールアドレス（省略時は先頭ユーザー）')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['months'] <= MAX_MONTHS:
+            raise CommandError(f'--months は1〜{MAX_MONTHS}で指定してください')
+        if not 1 <= options['simulations'] <= MAX_SIMULATIONS:
+            raise CommandError(f'--simulations は1〜{MAX_SIMULATIONS}で指定してください')
+        if not 0 <= options['continuation_rate'] <= 1:
+            raise CommandError('--continuation-rate は0〜1で指定してください')
+        if not -1 < options['rate_increase'] < 1:
+            raise CommandError('--rate-increase は-1より大きく1未満で指定してください')
+        if options['new_hires'] < 0:
+            raise CommandError('--new-hires は0以上で指定してください')
+
+        if options['user']:
+            created_by = ProdiaUser.objects.filter(email=options['user']).first()
+            if created_by is None:
+                raise CommandError(f"ユーザーが見つかりません: {options['user']}")
+        else:
+            created_by = ProdiaUser.objects.first()
+            if created_by is None:
+                raise CommandError('作成者となるユーザーが存在しません')
+
+        started = time.monotonic()
+        result = run_forecast(
+            created_by,
+            months=options['months'],
+            simulations=options['simulations'],
+            continuation_rate=options['continuation_rate'],
+            rate_increase=options['rate_increase'],
+            new_hires=options['new_hires'],
+            seed=options['seed'],
+        )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f"エンジニア {result['engineers']}名 × {result['simulations']}回 × {result['months']}ヶ月 "
+            f"（{elapsed:.1f}秒）"
+        )
+        for scenario, values in result['monthly'].items():
+            self.stdout.write(f"  {scenario}: 初月 {values[0]:,} 円 / 最終月 {values[-1]:,} 円")
+        self.stdout.write(self.style.SUCCESS(f"{result['saved']}件の予測を保存しました"))
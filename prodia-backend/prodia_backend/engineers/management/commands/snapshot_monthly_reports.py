@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from engineers.utilization import snapshot_monthly_reports
+
+
+class Command(BaseCommand):
+    help = '月次プロジェクトレポートの今月分を更新し、前月以前を確定する（日次の定期実行を想定）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', type=int, default=0,
+                            help='行の無い過去月を何ヶ月前まで参画期間の履歴から作成するか')
+
+    def handle(self, *args, **options):
+        if options['backfill'] < 0:
+            raise CommandError('--backfill は0以上で指定してください')
+        result = snapshot_monthly_reports(backfill_months=options['backfill'])
+        current = result['current']
+        self.stdout.write(f"{current.year_month}: IDR {current.idr_count} / BP {current.bp_count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"確定 {result['locked']}件 / 履歴から作成 {result['backfilled']}件"
+        ))
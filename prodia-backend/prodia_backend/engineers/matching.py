@@ -0,0 +1,217 @@
+"""
+案件 × エンジニア候補マッチング
+
+IDR（Engineer）と BP（PartnerEngineer）のスキルを転置インデックス（スキル → エンジニア集合）として
+メモリ上に保持し、案件の必要スキル・参画予定日・想定単価に対する適合度で候補をランキングする。
+
+インデックスは保存時には更新せず、各ワーカープロセスが問い合わせのたびに遅延して更新する。
+初回に全件ロードし、以降は updated_at（インデックス済み）と DeletedRecord（削除トゥームストーン）から
+差分のみ取り込むため、保存・削除はどのワーカープロセスで行われても次回の問い合わせで反映される。
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .mixins import DELTA_SYNC_OVERLAP
+from .models import DeletedRecord, Engineer, PartnerEngineer
+
+# スコアの重み（合計 1.0）
+SKILL_WEIGHT = 0.6
+AVAILABILITY_WEIGHT = 0.25
+RATE_WEIGHT = 0.15
+
+# 参画予定日から何日遅れで空くと可用性スコアが 0 になるか
+AVAILABILITY_GRACE_DAYS = 60
+# 想定単価を何割超えると単価スコアが 0 になるか
+RATE_TOLERANCE = 0.2
+
+IDR_WAITING = '未アサイン'
+BP_AVAILABLE_STATUSES = ('free', 'inactive')
+
+ENGINEER_FIELDS = ('id', 'name', 'skills', 'engineer_status', 'project_end_date', 'monthly_rate', 'updated_at')
+PARTNER_FIELDS = (
+    'id', 'name', 'skills', 'status', 'contract_end', 'partner_unit_price',
+    'partner_company', 'updated_at',
+)
+
+
+def normalize_skill(skill):
+    return str(skill).strip().lower()
+
+
+def _skill_list(skills):
+    if not isinstance(skills, list):
+        return []
+    return [s for s in skills if isinstance(s, str) and s.strip()]
+
+
+class CandidateIndex:
+    """スキル転置インデックス（プロセス内シングルトン）"""
+
+    def __init__(self):
+        self.profiles = {}                 # (kind, id) -> dict
+        self.by_skill = defaultdict(set)   # 正規化スキル -> {(kind, id)}
+        self.synced_at = None
+        self._lock = threading.Lock()
+
+    # ── インデックス更新 ──
+
+    def _remove(self, key):
+        profile = self.profiles.pop(key, None)
+        if profile:
+            for skill in profile['skill_keys']:
+                self.by_skill[skill].discard(key)
+                if not self.by_skill[skill]:
+                    del self.by_skill[skill]
+
+    def _add(self, key, profile):
+        self._remove(key)
+        self.profiles[key] = profile
+        for skill in profile['skill_keys']:
+            self.by_skill[skill].add(key)
+
+    def _engineer_profile(self, row):
+        waiting = row['engineer_status'] == IDR_WAITING
+        end = row['project_end_date']
+        return {
+            'type': 'idr',
+            'id': row['id'],
+            'name': row['name'],
+            'skills': _skill_list(row['skills']),
+            'skill_keys': {normalize_skill(s) for s in _skill_list(row['skills'])},
+            'status': row['engineer_status'],
+            'available_now': waiting,
+            'available_from': end + timedelta(days=1) if end and not waiting else None,
+            'monthly_rate': row['monthly_rate'],
+        }
+
+    def _partner_profile(self, row):
+        available_now = row['status'] in BP_AVAILABLE_STATUSES
+        end = row['contract_end']
+        return {
+            'type': 'bp',
+            'id': row['id'],
+            'name': row['name'],
+            'partner_company': row['partner_company'],
+            'skills': _skill_list(row['skills']),
+            'skill_keys': {normalize_skill(s) for s in _skill_list(row['skills'])},
+            'status': row['status'],
+            'available_now': available_now,
+            'available_from': end + timedelta(days=1) if end and not available_now else None,
+            'monthly_rate': row['partner_unit_price'],
+        }
+
+    def refresh(self):
+        """
+        前回同期以降の更新・削除を取り込む（初回は全件ロード）
+        差分同期（DeltaSyncMixin）と同じく、同期時刻より前の updated_at で後からコミットされた更新を
+        取りこぼさないよう DELTA_SYNC_OVERLAP だけ遡って取り込む（同じ行の再取り込みは上書きになるだけ）
+        """
+        with self._lock:
+            since = self.synced_at
+            now = timezone.now()
+            engineers = Engineer.objects.values(*ENGINEER_FIELDS)
+            partners = PartnerEngineer.objects.values(*PARTNER_FIELDS)
+            if since is not None:
+                engineers = engineers.filter(updated_at__gte=since)
+                partners = partners.filter(updated_at__gte=since)
+                deleted = DeletedRecord.objects.filter(
+                    target_type__in=('engineer', 'partnerengineer'), deleted_at__gte=since,
+                ).values_list('target_type', 'target_id')
+                for target_type, target_id in deleted:
+                    self._remove(('idr' if target_type == 'engineer' else 'bp', target_id))
+            for row in engineers:
+                self._add(('idr', row['id']), self._engineer_profile(row))
+            for row in partners:
+                self._add(('bp', row['id']), self._partner_profile(row))
+            self.synced_at = now - DELTA_SYNC_OVERLAP
+
+    # ── スコアリング ──
+
+    @staticmethod
+    def _availability_score(profile, start_date):
+        if profile['available_now']:
+            return 1.0
+        available_from = profile['available_from']
+        if available_from is None:
+            return 0.0
+        days_late = (available_from - start_date).days
+        if days_late <= 0:
+            return 1.0
+        return max(0.0, 1 - days_late / AVAILABILITY_GRACE_DAYS)
+
+    @staticmethod
+    def _rate_score(profile, expected_rate):
+        rate = profile['monthly_rate']
+        if not rate or not expected_rate:
+            return 0.5
+        over = (float(rate) - float(expected_rate)) / float(expected_rate)
+        if over <= 0:
+            return 1.0
+        return max(0.0, 1 - over / RATE_TOLERANCE)
+
+    def rank(self, required_skills, start_date=None, expected_rate=None, kind=None, limit=20):
+        with self._lock:
+            return self._rank(required_skills, start_date, expected_rate, kind, limit)
+
+    def _rank(self, required_skills, start_date, expected_rate, kind, limit):
+        required = {normalize_skill(s): s for s in _skill_list(required_skills)}
+        start_date = start_date or timezone.localdate()
+
+        if required:
+            keys = set()
+            for skill in required:
+                keys |= self.by_skill.get(skill, set())
+        else:
+            keys = set(self.profiles)
+        if kind:
+            keys = {k for k in keys if k[0] == kind}
+
+        results = []
+        for key in keys:
+            profile = self.profiles[key]
+            matched = [required[s] for s in required if s in profile['skill_keys']]
+            skill_score = len(matched) / len(required) if required else 0.0
+            availability_score = self._availability_score(profile, start_date)
+            rate_score = self._rate_score(profile, expected_rate)
+            score = (SKILL_WEIGHT * skill_score
+                     + AVAILABILITY_WEIGHT * availability_score
+                     + RATE_WEIGHT * rate_score)
+            candidate = {
+                'type': profile['type'],
+                'id': profile['id'],
+                'name': profile['name'],
+                'status': profile['status'],
+                'skills': profile['skills'],
+                'matched_skills': matched,
+                'missing_skills': [required[s] for s in required if s not in profile['skill_keys']],
+                'available_from': None if profile['available_now'] else profile['available_from'],
+                'monthly_rate': profile['monthly_rate'],
+                'score': round(score * 100, 1),
+                'skill_score': round(skill_score, 2),
+                'availability_score': round(availability_score, 2),
+                'rate_score': round(rate_score, 2),
+            }
+            if profile['type'] == 'bp':
+                candidate['partner_company'] = profile['partner_company']
+            results.append(candidate)
+
+        results.sort(key=lambda c: (-c['score'], c['name']))
+        return results[:limit]
+
+
+candidate_index = CandidateIndex()
+
+
+def rank_candidates_for_deal(deal, kind=None, limit=20):
+    """案件に対する候補エンジニアのランキング"""
+    candidate_index.refresh()
+    return candidate_index.rank(
+        deal.required_skills,
+        start_date=deal.expected_start_date,
+        expected_rate=deal.expected_monthly_rate,
+        kind=kind,
+        limit=limit,
+    )
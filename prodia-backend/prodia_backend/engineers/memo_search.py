@@ -0,0 +1,154 @@
+"""
+営業メモ（SalesMemo）の全文検索
+
+PostgreSQL の標準パーサは日本語を単語に分割できないため、Python 側で英数字は単語単位、
+それ以外（漢字・かな等）は文字 bigram に分割した語（1文字でも検索できるよう各連続の末尾の文字も加える）を
+位置・重み付きの tsvector として search_vector に保存し、GIN インデックスで検索する（tsvector / tsquery のリテラルを直接
+組み立てるため、データベースのロケールやテキスト検索設定に依存しない）。
+タイトル（A）・タグ（B）・本文（C）の重みで ts_rank により並べ、ハイライトは Python で付与する。
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import F, Value
+from django.db.models.functions import Cast
+from django.utils.html import escape
+
+# 英数字の単語、またはそれ以外の文字（漢字・かな等）の連続
+TOKEN_RE = re.compile(r'[a-z0-9]+|[^\W_a-z0-9]+')
+
+# tsvector の位置の上限（これを超える位置は PostgreSQL 側で上限値に丸められる）
+MAX_POSITION = 16383
+
+SNIPPET_LENGTH = 80
+
+# search_vector の元になるフィールド
+SOURCE_FIELDS = ('title', 'tags', 'content')
+
+
+class TsQueryLiteral(SearchQuery):
+    """tsquery リテラルをそのまま使う検索条件（to_tsquery のパーサを通さない）"""
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.get_source_expressions()[-1])
+        return f'{sql}::tsquery', params
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text):
+    """検索語に分割（英数字は単語、それ以外は隣り合う2文字ずつ。1文字だけの連続はそのまま）"""
+    tokens = []
+    for match in TOKEN_RE.finditer(_normalize(text)):
+        part = match.group()
+        if part.isascii() or len(part) == 1:
+            tokens.append(part)
+        else:
+            tokens.extend(part[i:i + 2] for i in range(len(part) - 1))
+    return tokens
+
+
+def _index_tokens(text):
+    """
+    保存用の語と、位置を進めるかどうか
+    bigram に分割した連続は末尾の文字も1文字の語として直前の bigram と同じ位置に加える。
+    1文字の検索（前方一致）は bigram の先頭にしか一致しないため、連続の末尾の文字
+    （例: 「関東」の「東」）はこの語で一致させる。同じ位置にするので語の並び（<->）は変わらない。
+    """
+    for match in TOKEN_RE.finditer(_normalize(text)):
+        part = match.group()
+        if part.isascii() or len(part) == 1:
+            yield part, True
+        else:
+            for i in range(len(part) - 1):
+                yield part[i:i + 2], True
+            yield part[-1], False
+
+
+def _memo_texts(memo):
+    tags = memo.tags if isinstance(memo.tags, list) else []
+    return (
+        (memo.title, 'A'),
+        (' '.join(str(tag) for tag in tags), 'B'),
+        (memo.content, 'C'),
+    )
+
+
+def vector_literal(memo):
+    """メモの tsvector リテラル（'語':位置重み ...）。フィールドの順に位置を通し番号で振る"""
+    entries = []
+    position = 0
+    for text, weight in _memo_texts(memo):
+        for token, advance in _index_tokens(text):
+            if advance:
+                position = min(position + 1, MAX_POSITION)
+            entries.append(f"'{token}':{position}{weight}")
+    return ' '.join(entries)
+
+
+def search_vector(memo):
+    """search_vector に保存する式"""
+    return Cast(Value(vector_literal(memo)), output_field=SearchVectorField())
+
+
+def query_literal(query):
+    """
+    検索文字列の tsquery リテラル
+    空白区切りの各語は bigram の並び（<->）で一致させ、語どうしは AND。
+    英数字で終わる語と1文字の語は前方一致（:*）にする（入力途中の検索向け）。
+    """
+    phrases = []
+    for term in query.split():
+        tokens = tokenize(term)
+        if not tokens:
+            continue
+        quoted = [f"'{token}'" for token in tokens]
+        if tokens[-1].isascii() or len(tokens[-1]) == 1:
+            quoted[-1] += ':*'
+        phrases.append('(' + ' <-> '.join(quoted) + ')')
+    return ' & '.join(phrases)
+
+
+def search(queryset, query):
+    """
+    全文検索して rank を付与し、関連度順に並べる（検索語が空なら None）
+    search_vector @@ tsquery は GIN インデックスで絞り込む
+    """
+    literal = query_literal(query)
+    if not literal:
+        return None
+    tsquery = TsQueryLiteral(literal)
+    return (
+        queryset.filter(search_vector=tsquery)
+        .annotate(rank=SearchRank(F('search_vector'), tsquery))
+        .order_by('-rank', '-updated_at')
+    )
+
+
+def highlight(text, query, length=None):
+    """
+    検索語に一致した部分を <mark> で囲んだ HTML（エスケープ済み）を返す
+    length を指定すると最初の一致を中心に length 文字程度の抜粋にする
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    terms = sorted({unicodedata.normalize('NFKC', term) for term in query.split()}, key=len, reverse=True)
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+    first = pattern.search(text) if pattern else None
+
+    start, end = 0, len(text)
+    if length and len(text) > length:
+        center = first.start() if first else 0
+        start = max(0, min(center - length // 3, len(text) - length))
+        end = start + length
+    excerpt = text[start:end]
+
+    parts, cursor = [], 0
+    for match in (pattern.finditer(excerpt) if pattern else []):
+        parts.append(escape(excerpt[cursor:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        cursor = match.end()
+    parts.append(escape(excerpt[cursor:]))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
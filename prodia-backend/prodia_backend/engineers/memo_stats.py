@@ -0,0 +1,71 @@
+"""
+営業メモ（SalesMemo）ダッシュボードの集計
+
+全体・作成者別・エンジニア別の件数は (author, engineer_name) の GROUP BY と条件付き集計の
+1クエリで取得して Python で合算する。
+"""
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import SalesMemo
+
+RECENT_MEMO_COUNT = 5
+COUNTERS = ('total', 'open', 'pending_tasks', 'engineer_memos', 'urgent_open', 'overdue')
+
+
+def _aggregates(now):
+    open_memo = Q(is_completed=False)
+    return {
+        'total': Count('id'),
+        'open': Count('id', filter=open_memo),
+        'pending_tasks': Count('id', filter=open_memo & Q(memo_type='task')),
+        'engineer_memos': Count('id', filter=Q(memo_type='engineer')),
+        'urgent_open': Count('id', filter=open_memo & Q(priority='urgent')),
+        'overdue': Count('id', filter=open_memo & Q(due_date__lt=now)),
+    }
+
+
+def _add(target, row):
+    for key in COUNTERS:
+        target[key] = target.get(key, 0) + row[key]
+
+
+def compute_counters(now=None):
+    """全体・作成者別・エンジニア別の件数"""
+    now = now or timezone.now()
+    rows = SalesMemo.objects.order_by().values('author', 'engineer_name').annotate(**_aggregates(now))
+
+    overall, by_author, by_engineer = dict.fromkeys(COUNTERS, 0), {}, {}
+    for row in rows:
+        _add(overall, row)
+        _add(by_author.setdefault(row['author'], {}), row)
+        if row['engineer_name']:
+            _add(by_engineer.setdefault(row['engineer_name'], {}), row)
+
+    def ranked(groups, key):
+        return [{key: name, **counts} for name, counts in sorted(groups.items(), key=lambda g: (-g[1]['total'], g[0]))]
+
+    return {
+        'overall': overall,
+        'by_author': ranked(by_author, 'author'),
+        'by_engineer': ranked(by_engineer, 'engineer_name'),
+    }
+
+
+def dashboard(serialize_recent):
+    """
+    ダッシュボードのデータ（件数の集計1クエリ + 最近更新されたメモ1クエリ）
+    serialize_recent: 最近更新されたメモのクエリセットをシリアライズする関数
+    """
+    counters = compute_counters()
+    overall = counters['overall']
+    return {
+        # 従来のキー
+        'total_memos': overall['total'],
+        'pending_tasks': overall['pending_tasks'],
+        'engineer_memos': overall['engineer_memos'],
+        'urgent_memos': overall['urgent_open'],
+        'overdue_memos': overall['overdue'],
+        **counters,
+        'recent_memos': serialize_recent(SalesMemo.objects.order_by('-updated_at')[:RECENT_MEMO_COUNT]),
+    }
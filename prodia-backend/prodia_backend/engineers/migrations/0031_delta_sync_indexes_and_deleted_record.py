@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0030_add_calendar_event_and_activity_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(max_length=50, verbose_name='対象種別')),
+                ('target_id', models.BigIntegerField(verbose_name='対象ID')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='削除日時')),
+            ],
+            options={
+                'verbose_name': '削除記録',
+                'verbose_name_plural': '削除記録',
+                'ordering': ['-deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bpprospect',
+            index=models.Index(fields=['updated_at'], name='bpprospect_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deal',
+            index=models.Index(fields=['updated_at'], name='deal_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engineer',
+            index=models.Index(fields=['updated_at'], name='engineer_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partnerengineer',
+            index=models.Index(fields=['updated_at'], name='partner_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ppinterview',
+            index=models.Index(fields=['updated_at'], name='ppinterview_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletedrecord',
+            index=models.Index(fields=['target_type', 'deleted_at'], name='deleted_record_type_at_idx'),
+        ),
+    ]
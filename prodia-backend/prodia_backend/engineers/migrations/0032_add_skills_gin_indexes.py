@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:36
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0031_delta_sync_indexes_and_deleted_record'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='engineer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skills'], name='engineer_skills_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='partnerengineer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skills'], name='partner_skills_gin'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0032_add_skills_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='engineer',
+            index=models.Index(fields=['project_end_date'], name='engineer_project_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partnerengineer',
+            index=models.Index(fields=['contract_end'], name='partner_contract_end_idx'),
+        ),
+    ]
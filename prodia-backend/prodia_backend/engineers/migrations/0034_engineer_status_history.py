@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0033_add_contract_end_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngineerStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, verbose_name='ステータス')),
+                ('started_at', models.DateTimeField(verbose_name='開始日時')),
+                ('ended_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('engineer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='engineers.engineer', verbose_name='エンジニア')),
+            ],
+            options={
+                'verbose_name': 'ステータス履歴',
+                'verbose_name_plural': 'ステータス履歴',
+                'ordering': ['engineer', 'started_at'],
+                'indexes': [models.Index(fields=['engineer', 'started_at'], name='status_history_engineer_idx'), models.Index(fields=['status', 'started_at', 'ended_at'], name='status_history_range_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('ended_at__isnull', True)), fields=('engineer',), name='status_history_one_open_per_engineer')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+import re
+from datetime import datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+# 操作ログ（EngineerList.jsx）の変更内容 "ステータス: 旧 → 新" を拾う
+STATUS_CHANGE_RE = re.compile(r'ステータス: (.*?) → (.*?)(?:、|$)')
+UNSET = '(未設定)'
+
+
+def _aware(d):
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+def backfill(apps, schema_editor):
+    """
+    既存エンジニアのステータス履歴を作成する
+    操作ログのステータス変更（対象名が一意に特定できるもの）から過去の遷移を復元し、
+    最後に現在のステータスを開始日時不明分も含めて open な行として記録する。
+    """
+    Engineer = apps.get_model('engineers', 'Engineer')
+    ActivityLog = apps.get_model('engineers', 'ActivityLog')
+    EngineerStatusHistory = apps.get_model('engineers', 'EngineerStatusHistory')
+
+    now = timezone.now()
+    engineers = list(Engineer.objects.all())
+    name_counts = {}
+    for e in engineers:
+        name_counts[e.name] = name_counts.get(e.name, 0) + 1
+
+    transitions = {}
+    logs = ActivityLog.objects.filter(target_type='engineer', action='update').order_by('created_at')
+    for log in logs.iterator():
+        details = log.details if isinstance(log.details, str) else ''
+        match = STATUS_CHANGE_RE.search(details)
+        if match and name_counts.get(log.target_name) == 1:
+            transitions.setdefault(log.target_name, []).append((log.created_at, match.group(1), match.group(2)))
+
+    rows = []
+    for e in engineers:
+        changes = transitions.get(e.name, [])
+        started_at = min(e.created_at or now, changes[0][0]) if changes else (e.created_at or now)
+        for changed_at, old, _ in changes:
+            if old and old != UNSET:
+                rows.append(EngineerStatusHistory(engineer_id=e.id, status=old,
+                                                  started_at=started_at, ended_at=changed_at))
+            started_at = changed_at
+        if not changes:
+            # 操作ログが無い場合は現在の状態から開始時期を推定
+            if e.engineer_status == '未アサイン' and e.waiting_since:
+                started_at = _aware(e.waiting_since)
+            elif e.project_start_date and e.project_start_date <= now.date():
+                started_at = _aware(e.project_start_date)
+        rows.append(EngineerStatusHistory(engineer_id=e.id, status=e.engineer_status,
+                                          started_at=min(started_at, now), ended_at=None))
+    EngineerStatusHistory.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0034_engineer_status_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0035_backfill_engineer_status_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dealactivity',
+            index=models.Index(fields=['deal', 'created_at'], name='deal_activity_deal_created_idx'),
+        ),
+    ]
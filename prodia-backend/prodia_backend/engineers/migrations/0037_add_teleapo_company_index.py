@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0036_add_deal_activity_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teleaporecord',
+            index=models.Index(fields=['company_name', '-call_date', '-created_at'], name='teleapo_company_call_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0037_add_teleapo_company_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teleaporecord',
+            name='company',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='teleapo_records', to='engineers.company', verbose_name='企業'),
+        ),
+        migrations.AddIndex(
+            model_name='teleaporecord',
+            index=models.Index(fields=['company', '-call_date', '-created_at'], name='teleapo_company_fk_call_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+# 1回の UPDATE で処理する id の範囲（長時間のロックを避けるためチャンクごとにコミットする）
+CHUNK_SIZE = 5000
+
+
+def backfill(apps, schema_editor):
+    """既存のテレアポ記録を企業名の完全一致（前後の空白は無視）で企業マスターに紐付ける"""
+    Company = apps.get_model('engineers', 'Company')
+    TeleapoRecord = apps.get_model('engineers', 'TeleapoRecord')
+
+    last_id = TeleapoRecord.objects.aggregate(m=Max('id'))['m'] or 0
+    company_id = Subquery(Company.objects.filter(name=OuterRef('company_name')).values('id')[:1])
+    for start in range(0, last_id + 1, CHUNK_SIZE):
+        with transaction.atomic():
+            chunk = TeleapoRecord.objects.filter(
+                id__gte=start, id__lt=start + CHUNK_SIZE, company__isnull=True,
+            )
+            chunk.update(company=company_id)
+
+    # 前後に空白を含む企業名は個別に照合する
+    names = dict(Company.objects.values_list('name', 'id'))
+    unmatched = TeleapoRecord.objects.filter(company__isnull=True).values_list('id', 'company_name')
+    for record_id, company_name in unmatched.iterator(chunk_size=CHUNK_SIZE):
+        matched = names.get((company_name or '').strip())
+        if matched:
+            TeleapoRecord.objects.filter(id=record_id).update(company_id=matched)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('engineers', '0038_teleapo_record_company'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:52
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# 作成時点の engineers.search.normalize_company_name の写し（後の変更でこのマイグレーションの結果が変わらないように）
+LEGAL_ENTITY_RE = re.compile(
+    r'株式会社|有限会社|合同会社|合資会社|合名会社|'
+    r'一般社団法人|一般財団法人|公益社団法人|公益財団法人|特定非営利活動法人|'
+    r'\((?:株|有|同|資|名|社|財)\)'
+)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_company_name(value):
+    text = unicodedata.normalize('NFKC', value or '')
+    text = LEGAL_ENTITY_RE.sub('', text)
+    return WHITESPACE_RE.sub('', text).lower()
+
+
+def backfill(apps, schema_editor):
+    """既存の企業・テレアポ記録の検索用企業名を設定"""
+    for model_name, source, target in (
+        ('Company', 'name', 'search_name'),
+        ('TeleapoRecord', 'company_name', 'company_name_search'),
+    ):
+        model = apps.get_model('engineers', model_name)
+        batch = []
+        for obj in model.objects.only('id', source).iterator(chunk_size=BATCH_SIZE):
+            setattr(obj, target, normalize_company_name(getattr(obj, source)))
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, [target])
+                batch = []
+        model.objects.bulk_update(batch, [target])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0039_backfill_teleapo_record_company'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='company',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200, verbose_name='検索用企業名'),
+        ),
+        migrations.AddField(
+            model_name='teleaporecord',
+            name='company_name_search',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200, verbose_name='検索用企業名'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_name'], name='company_search_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='teleaporecord',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['company_name_search'], name='teleapo_company_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
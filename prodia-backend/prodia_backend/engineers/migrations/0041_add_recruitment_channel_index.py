@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0040_company_search_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recruitmentchannel',
+            index=models.Index(fields=['channel', 'applied_at'], name='recruit_channel_applied_idx'),
+        ),
+    ]
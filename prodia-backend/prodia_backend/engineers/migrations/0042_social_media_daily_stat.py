@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:55
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+METRICS = ('views_count', 'likes_count', 'comments_count', 'shares_count', 'impressions', 'reach')
+
+
+def backfill(apps, schema_editor):
+    """既存の投稿から日別集計を作成"""
+    SocialMediaPost = apps.get_model('engineers', 'SocialMediaPost')
+    SocialMediaDailyStat = apps.get_model('engineers', 'SocialMediaDailyStat')
+    rows = (
+        SocialMediaPost.objects.annotate(date=TruncDate('posted_at'))
+        .order_by()
+        .values('date', 'platform')
+        .annotate(
+            posts_count=Count('id'),
+            engagement_rate_sum=Sum('engagement_rate'),
+            **{metric: Sum(metric) for metric in METRICS},
+        )
+    )
+    SocialMediaDailyStat.objects.bulk_create([SocialMediaDailyStat(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0041_add_recruitment_channel_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocialMediaDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='投稿日')),
+                ('platform', models.CharField(choices=[('tiktok', 'TikTok'), ('instagram', 'Instagram'), ('x', 'X（Twitter）')], max_length=20, verbose_name='プラットフォーム')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='投稿数')),
+                ('views_count', models.BigIntegerField(default=0, verbose_name='視聴数')),
+                ('likes_count', models.BigIntegerField(default=0, verbose_name='いいね数')),
+                ('comments_count', models.BigIntegerField(default=0, verbose_name='コメント数')),
+                ('shares_count', models.BigIntegerField(default=0, verbose_name='シェア数')),
+                ('impressions', models.BigIntegerField(default=0, verbose_name='インプレッション')),
+                ('reach', models.BigIntegerField(default=0, verbose_name='リーチ')),
+                ('engagement_rate_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='エンゲージメント率合計')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'SNS日別集計',
+                'verbose_name_plural': 'SNS日別集計',
+                'ordering': ['date', 'platform'],
+                'unique_together': {('date', 'platform')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+METRICS = ('likes_count', 'comments_count', 'shares_count', 'views_count', 'impressions', 'reach')
+
+
+def seed(apps, schema_editor):
+    """既存投稿の現在の指標を最初のスナップショットとして記録（最終同期日時の時点）"""
+    SocialMediaPost = apps.get_model('engineers', 'SocialMediaPost')
+    SocialMediaMetricSnapshot = apps.get_model('engineers', 'SocialMediaMetricSnapshot')
+    now = timezone.now()
+    SocialMediaMetricSnapshot.objects.bulk_create([
+        SocialMediaMetricSnapshot(
+            post_id=post.id, platform=post.platform, captured_at=post.last_synced_at or now,
+            **{metric: getattr(post, metric) for metric in METRICS},
+        )
+        for post in SocialMediaPost.objects.only('id', 'platform', 'last_synced_at', *METRICS).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0042_social_media_daily_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocialMediaMetricSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('tiktok', 'TikTok'), ('instagram', 'Instagram'), ('x', 'X（Twitter）')], max_length=20, verbose_name='プラットフォーム')),
+                ('captured_at', models.DateTimeField(verbose_name='取得日時')),
+                ('resolution', models.CharField(choices=[('raw', '取得時点'), ('hour', '1時間'), ('day', '1日')], default='raw', max_length=4, verbose_name='粒度')),
+                ('likes_count', models.IntegerField(default=0, verbose_name='いいね数')),
+                ('comments_count', models.IntegerField(default=0, verbose_name='コメント数')),
+                ('shares_count', models.IntegerField(default=0, verbose_name='シェア数')),
+                ('views_count', models.IntegerField(default=0, verbose_name='視聴数')),
+                ('impressions', models.IntegerField(default=0, verbose_name='インプレッション')),
+                ('reach', models.IntegerField(default=0, verbose_name='リーチ')),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='metric_snapshots', to='engineers.socialmediapost', verbose_name='SNS投稿')),
+            ],
+            options={
+                'verbose_name': 'SNS指標スナップショット',
+                'verbose_name_plural': 'SNS指標スナップショット',
+                'ordering': ['post', 'captured_at'],
+                'indexes': [models.Index(fields=['platform', 'captured_at'], name='sns_snapshot_platform_idx'), models.Index(fields=['resolution', 'captured_at'], name='sns_snapshot_resolution_idx')],
+                'unique_together': {('post', 'captured_at')},
+            },
+        ),
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:00
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Cast
+
+BATCH_SIZE = 500
+
+# 作成時点の engineers.memo_search.search_vector の写し（後の変更でこのマイグレーションの結果が変わらないように）
+TOKEN_RE = re.compile(r'[a-z0-9]+|[^\W_a-z0-9]+')
+MAX_POSITION = 16383
+
+
+def tokenize(text):
+    tokens = []
+    for match in TOKEN_RE.finditer(unicodedata.normalize('NFKC', text or '').lower()):
+        part = match.group()
+        if part.isascii() or len(part) == 1:
+            tokens.append(part)
+        else:
+            tokens.extend(part[i:i + 2] for i in range(len(part) - 1))
+    return tokens
+
+
+def search_vector(memo):
+    tags = memo.tags if isinstance(memo.tags, list) else []
+    entries = []
+    position = 0
+    for text, weight in ((memo.title, 'A'), (' '.join(str(tag) for tag in tags), 'B'), (memo.content, 'C')):
+        for token in tokenize(text):
+            position = min(position + 1, MAX_POSITION)
+            entries.append(f"'{token}':{position}{weight}")
+    return Cast(Value(' '.join(entries)), output_field=django.contrib.postgres.search.SearchVectorField())
+
+
+def backfill(apps, schema_editor):
+    """既存メモの search_vector を作成"""
+    SalesMemo = apps.get_model('engineers', 'SalesMemo')
+    batch = []
+    for memo in SalesMemo.objects.only('id', 'title', 'tags', 'content').iterator(chunk_size=BATCH_SIZE):
+        memo.search_vector = search_vector(memo)
+        batch.append(memo)
+        if len(batch) >= BATCH_SIZE:
+            SalesMemo.objects.bulk_update(batch, ['search_vector'])
+            batch = []
+    SalesMemo.objects.bulk_update(batch, ['search_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0043_social_media_metric_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesmemo',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='salesmemo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='sales_memo_search_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0044_sales_memo_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='teleaporecord',
+            name='teleapo_company_call_idx',
+        ),
+        migrations.AddIndex(
+            model_name='teleaporecord',
+            index=models.Index(condition=models.Q(('company__isnull', True)), fields=['company_name'], name='teleapo_unlinked_name_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:19
+
+import re
+import unicodedata
+
+import django.contrib.postgres.search
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Cast
+
+BATCH_SIZE = 500
+
+# 作成時点の engineers.memo_search.search_vector の写し（各連続の末尾の文字を1文字の語として加える）
+TOKEN_RE = re.compile(r'[a-z0-9]+|[^\W_a-z0-9]+')
+MAX_POSITION = 16383
+
+
+def index_tokens(text):
+    for match in TOKEN_RE.finditer(unicodedata.normalize('NFKC', text or '').lower()):
+        part = match.group()
+        if part.isascii() or len(part) == 1:
+            yield part, True
+        else:
+            for i in range(len(part) - 1):
+                yield part[i:i + 2], True
+            yield part[-1], False
+
+
+def search_vector(memo):
+    tags = memo.tags if isinstance(memo.tags, list) else []
+    entries = []
+    position = 0
+    for text, weight in ((memo.title, 'A'), (' '.join(str(tag) for tag in tags), 'B'), (memo.content, 'C')):
+        for token, advance in index_tokens(text):
+            if advance:
+                position = min(position + 1, MAX_POSITION)
+            entries.append(f"'{token}':{position}{weight}")
+    return Cast(Value(' '.join(entries)), output_field=django.contrib.postgres.search.SearchVectorField())
+
+
+def rebuild(apps, schema_editor):
+    """既存メモの search_vector を作り直す"""
+    SalesMemo = apps.get_model('engineers', 'SalesMemo')
+    batch = []
+    for memo in SalesMemo.objects.only('id', 'title', 'tags', 'content').iterator(chunk_size=BATCH_SIZE):
+        memo.search_vector = search_vector(memo)
+        batch.append(memo)
+        if len(batch) >= BATCH_SIZE:
+            SalesMemo.objects.bulk_update(batch, ['search_vector'])
+            batch = []
+    SalesMemo.objects.bulk_update(batch, ['search_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engineers', '0045_teleapo_unlinked_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,209 @@
+"""
+ViewSet 共通 Mixin
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+def _split_param(value):
+    """カンマ区切りのクエリパラメータをリストに変換"""
+    if not value:
+        return []
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields= / ?exclude= で取得カラムとレスポンスのフィールドを絞り込む
+
+    例: /api/engineers/?fields=id,name,engineer_status,planner
+    指定フィールドが全てモデルのカラムであれば SELECT 句も .only() で絞る。
+    serializer_class は SparseFieldsetSerializerMixin を継承していること。
+    """
+
+    def _sparse_params(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return [], []
+        params = request.query_params
+        return _split_param(params.get('fields')), _split_param(params.get('exclude'))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, exclude = self._sparse_params()
+        columns = {f.name for f in queryset.model._meta.concrete_fields}
+        if fields and set(fields) <= columns:
+            queryset = queryset.only(queryset.model._meta.pk.name, *fields)
+        elif exclude:
+            deferred = [name for name in exclude if name in columns and name != queryset.model._meta.pk.name]
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields, exclude = self._sparse_params()
+        if fields:
+            kwargs.setdefault('fields', fields)
+        if exclude:
+            kwargs.setdefault('exclude', exclude)
+        return super().get_serializer(*args, **kwargs)
+
+
+class SkillFilterMixin:
+    """
+    ?skills=Python,AWS&match=all|any でスキル（JSON配列）を絞り込む
+
+    all（既定）: 全スキルを含む  → skills @> '["Python","AWS"]'
+    any        : いずれかを含む → skills ?| array['Python','AWS']
+    どちらも skills の GIN インデックスで検索される。
+    絞り込むのは一覧系のアクション（skill_filter_actions）のみ。
+    """
+    skill_filter_actions = ('list', 'export')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = getattr(self, 'request', None)
+        if request is None or getattr(self, 'action', None) not in self.skill_filter_actions:
+            return queryset
+        skills = _split_param(request.query_params.get('skills'))
+        if skills:
+            if request.query_params.get('match', 'all') == 'any':
+                queryset = queryset.filter(skills__has_any_keys=skills)
+            else:
+                queryset = queryset.filter(skills__contains=skills)
+        return queryset
+
+
+# updated_at は保存時の時刻のため、それより後にコミットされた更新を取りこぼさないよう
+# server_time をトランザクションの最大所要時間ぶん戻して返す（重なった分はクライアントが id で除く）
+DELTA_SYNC_OVERLAP = timedelta(minutes=5)
+
+# 削除記録（DeletedRecord）の保持期間。prune_deleted_records コマンドで古い記録を削除する
+DELETED_RECORD_RETENTION = timedelta(days=90)
+
+
+def parse_since(value):
+    """updated_since パラメータ（ISO日時 or 日付）を aware datetime に変換。不正値は None"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class DeltaSyncMixin:
+    """
+    ?updated_since=<日時> 指定時は、その日時以降に更新されたレコードと削除されたIDのみ返す
+
+    レスポンス: {"server_time", "results", "deleted", "full_resync_required"}
+    クライアントは server_time を次回の updated_since に使い、results は id で重複を除いて反映する
+    （server_time は DELTA_SYNC_OVERLAP だけ前の時刻のため、前回と同じレコードが含まれることがある）。
+    削除は signals.record_deletion が DeletedRecord に記録し、DELETED_RECORD_RETENTION より古い記録は
+    削除されるため、それより前の updated_since では削除を取りこぼす。その場合は
+    full_resync_required が true になるので、クライアントは全件を取得し直すこと。
+    """
+    delta_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        raw = request.query_params.get('updated_since')
+        if not raw:
+            return super().list(request, *args, **kwargs)
+
+        since = parse_since(raw)
+        if since is None:
+            return Response({'error': 'updated_since の形式が不正です（ISO 8601 日時）'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        from .models import DeletedRecord
+
+        now = timezone.now()
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{f'{self.delta_field}__gte': since})
+        deleted = DeletedRecord.objects.filter(
+            target_type=queryset.model._meta.model_name,
+            deleted_at__gte=since,
+        ).values_list('target_id', flat=True)
+
+        return Response({
+            'server_time': now - DELTA_SYNC_OVERLAP,
+            'results': self.get_serializer(queryset, many=True).data,
+            'deleted': list(deleted),
+            'full_resync_required': since < now - DELETED_RECORD_RETENTION,
+        })
+
+
+class _Echo:
+    """csv.writer の出力をそのまま返す疑似バッファ"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class StreamingExportMixin:
+    """
+    /export/ アクション：一覧と同じ絞り込み条件で全件をストリーミング出力する
+
+    ?output=csv（既定、BOM付きUTF-8）| ndjson
+    サーバーサイドカーソル（.iterator(chunk_size=...)）で読み出すため、件数に関わらずメモリ使用量は一定。
+    ※ ?format= は DRF のコンテントネゴシエーションが使うため output で指定する。
+    """
+    export_chunk_size = 2000
+    export_filename = 'export'
+
+    def _export_rows(self, queryset, serializer):
+        for obj in queryset.iterator(chunk_size=self.export_chunk_size):
+            yield serializer.to_representation(obj)
+
+    def _stream_csv(self, rows, serializer):
+        names = list(serializer.fields)
+        writer = csv.writer(_Echo())
+        yield '\ufeff' + writer.writerow([serializer.fields[n].label or n for n in names])
+        for row in rows:
+            yield writer.writerow([_csv_value(row.get(n)) for n in names])
+
+    def _stream_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        output = request.query_params.get('output', 'csv').lower()
+        if output not in ('csv', 'ndjson'):
+            return Response({'error': 'output は csv または ndjson を指定してください'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = self._export_rows(queryset, serializer)
+        filename = f"{self.export_filename}_{timezone.localdate():%Y%m%d}.{output}"
+
+        if output == 'ndjson':
+            response = StreamingHttpResponse(self._stream_ndjson(rows),
+                                             content_type='application/x-ndjson; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(self._stream_csv(rows, serializer),
+                                             content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -1,7 +1,13 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
 
+from . import memo_search
+from .search import normalize_company_name
+
+
 # Prodiaユーザー管理（ログイン専用）
 class ProdiaUser(models.Model):
     name = models.CharField(max_length=100)
@@ -155,6 +161,11 @@ class Engineer(models.Model):
     class Meta:
         verbose_name = "エンジニア"
         verbose_name_plural = "エンジニア"
+        indexes = [
+            models.Index(fields=['updated_at'], name='engineer_updated_at_idx'),
+            GinIndex(fields=['skills'], name='engineer_skills_gin'),
+            models.Index(fields=['project_end_date'], name='engineer_project_end_idx'),
+        ]
 
 
 # スキルシートファイル管理モデル
@@ -224,17 +235,34 @@ class SalesMemo(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_shared = models.BooleanField(default=False)  # チーム共有フラグ
 
+    # 全文検索用（タイトル・タグ・本文の bigram。memo_search で保存時に更新）
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+
     class Meta:
         ordering = ['-updated_at']
         indexes = [
             models.Index(fields=['memo_type', 'engineer_name']),
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['is_completed', 'due_date']),
+            GinIndex(fields=['search_vector'], name='sales_memo_search_idx'),
         ]
 
     def __str__(self):
         return f"{self.get_memo_type_display()}: {self.title}"
 
+    def save(self, *args, **kwargs):
+        # search_vector は同じ INSERT / UPDATE で式として保存する（update_fields 指定時は元のフィールドを含む場合のみ）
+        update_fields = kwargs.get('update_fields')
+        refresh_vector = update_fields is None or bool(set(update_fields) & set(memo_search.SOURCE_FIELDS))
+        if refresh_vector:
+            self.search_vector = memo_search.search_vector(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'search_vector'}
+        super().save(*args, **kwargs)
+        if refresh_vector:
+            # 式のままにしないよう未読み込みに戻す（参照時にデータベースから読み込む）
+            del self.search_vector
+
 
 # メモ添付ファイル（将来拡張用）
 class MemoAttachment(models.Model):
@@ -358,6 +386,9 @@ class RecruitmentChannel(models.Model):
         verbose_name = '採用経路管理'
         verbose_name_plural = '採用経路管理'
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['channel', 'applied_at'], name='recruit_channel_applied_idx'),
+        ]
     
     def __str__(self):
         return f"{self.applicant_name} - {self.get_channel_display()}"
@@ -405,17 +436,88 @@ class SocialMediaPost(models.Model):
         verbose_name_plural = 'SNS投稿'
         ordering = ['-posted_at']
     
-    def save(self, *args, **kwargs):
-        # エンゲージメント率の自動計算
+    def update_engagement_rate(self):
+        """エンゲージメント率の自動計算（bulk_update 前にも呼ぶ）"""
         if self.views_count > 0:
             total_engagement = self.likes_count + self.comments_count + self.shares_count
-            self.engagement_rate = (total_engagement / self.views_count) * 100
+            self.engagement_rate = round((total_engagement / self.views_count) * 100, 2)
+
+    def save(self, *args, **kwargs):
+        self.update_engagement_rate()
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.get_platform_display()} - {self.posted_at.strftime('%Y-%m-%d %H:%M')}"
 
 
+class SocialMediaDailyStat(models.Model):
+    """SNS投稿の日別・プラットフォーム別集計（投稿日ごと。sns_stats.refresh_daily_stats で更新）"""
+    date = models.DateField(verbose_name='投稿日')
+    platform = models.CharField(max_length=20, choices=SocialMediaPost.PLATFORM_CHOICES, verbose_name='プラットフォーム')
+
+    posts_count = models.IntegerField(default=0, verbose_name='投稿数')
+    views_count = models.BigIntegerField(default=0, verbose_name='視聴数')
+    likes_count = models.BigIntegerField(default=0, verbose_name='いいね数')
+    comments_count = models.BigIntegerField(default=0, verbose_name='コメント数')
+    shares_count = models.BigIntegerField(default=0, verbose_name='シェア数')
+    impressions = models.BigIntegerField(default=0, verbose_name='インプレッション')
+    reach = models.BigIntegerField(default=0, verbose_name='リーチ')
+    # 期間の平均エンゲージメント率は engagement_rate_sum の合計 ÷ posts_count の合計で求める
+    engagement_rate_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                              verbose_name='エンゲージメント率合計')
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'SNS日別集計'
+        verbose_name_plural = 'SNS日別集計'
+        ordering = ['date', 'platform']
+        unique_together = ['date', 'platform']
+
+    def __str__(self):
+        return f"{self.date} {self.get_platform_display()}"
+
+
+class SocialMediaMetricSnapshot(models.Model):
+    """
+    SNS投稿のエンゲージメント指標の時系列（追記のみ。sns_snapshots で記録・間引きする）
+    古い記録は1時間ごと → 1日ごとの最終値だけを残し、resolution に粒度を記録する。
+    """
+    RESOLUTION_CHOICES = [
+        ('raw',  '取得時点'),
+        ('hour', '1時間'),
+        ('day',  '1日'),
+    ]
+
+    # 単独インデックスは unique_together (post, captured_at) の先頭列で代替する
+    post = models.ForeignKey(SocialMediaPost, on_delete=models.CASCADE, related_name='metric_snapshots',
+                             db_index=False, verbose_name='SNS投稿')
+    # プラットフォーム別の範囲検索用（投稿から複製）
+    platform = models.CharField(max_length=20, choices=SocialMediaPost.PLATFORM_CHOICES, verbose_name='プラットフォーム')
+    captured_at = models.DateTimeField(verbose_name='取得日時')
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES, default='raw', verbose_name='粒度')
+
+    likes_count = models.IntegerField(default=0, verbose_name='いいね数')
+    comments_count = models.IntegerField(default=0, verbose_name='コメント数')
+    shares_count = models.IntegerField(default=0, verbose_name='シェア数')
+    views_count = models.IntegerField(default=0, verbose_name='視聴数')
+    impressions = models.IntegerField(default=0, verbose_name='インプレッション')
+    reach = models.IntegerField(default=0, verbose_name='リーチ')
+
+    class Meta:
+        verbose_name = 'SNS指標スナップショット'
+        verbose_name_plural = 'SNS指標スナップショット'
+        ordering = ['post', 'captured_at']
+        unique_together = ['post', 'captured_at']
+        indexes = [
+            models.Index(fields=['platform', 'captured_at'], name='sns_snapshot_platform_idx'),
+            models.Index(fields=['resolution', 'captured_at'], name='sns_snapshot_resolution_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} @ {self.captured_at:%Y-%m-%d %H:%M}"
+
+
 class RevenueForecast(models.Model):
     """売上予測サマリーモデル"""
     
@@ -521,6 +623,8 @@ class MonthlyRevenueSummary(models.Model):
 class Company(models.Model):
     """企業マスターリスト"""
     name = models.CharField(max_length=200, unique=True, verbose_name='企業名')
+    # あいまい検索用の正規化名（search.normalize_company_name）
+    search_name = models.CharField(max_length=200, blank=True, default='', editable=False, verbose_name='検索用企業名')
     memo = models.TextField(blank=True, null=True, verbose_name='備考')
     website_url = models.URLField(max_length=500, blank=True, null=True, verbose_name='ホームページURL')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -529,10 +633,17 @@ class Company(models.Model):
         verbose_name = "企業"
         verbose_name_plural = "企業一覧"
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['search_name'], opclasses=['gin_trgm_ops'], name='company_search_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_company_name(self.name)
+        super().save(*args, **kwargs)
+
 
 class CompanyAppointment(models.Model):
     """企業アポイント管理 - プランナー間の重複アポを防止"""
@@ -581,6 +692,14 @@ class TeleapoRecord(models.Model):
     ]
 
     company_name  = models.CharField(max_length=200, verbose_name='企業名')
+    # 企業マスターへの紐付け（company_name と一致する企業があれば保存時に自動で設定）
+    # 単独インデックスは teleapo_company_fk_call_idx の先頭列で代替する
+    company       = models.ForeignKey(
+        Company, on_delete=models.SET_NULL, null=True, blank=True, db_index=False,
+        related_name='teleapo_records', verbose_name='企業',
+    )
+    company_name_search = models.CharField(max_length=200, blank=True, default='', editable=False,
+                                           verbose_name='検索用企業名')
     phone_number  = models.CharField(max_length=50, blank=True, null=True, verbose_name='電話番号')
     planner       = models.CharField(max_length=100, verbose_name='プランナー名')
     call_date     = models.DateField(verbose_name='架電日')
@@ -593,10 +712,25 @@ class TeleapoRecord(models.Model):
         verbose_name = "テレアポ記録"
         verbose_name_plural = "テレアポ記録"
         ordering = ['-call_date', '-created_at']
+        indexes = [
+            # 企業の登録時に同名の未紐付け記録を探す（signals.company_saved）
+            models.Index(fields=['company_name'], condition=models.Q(company__isnull=True),
+                         name='teleapo_unlinked_name_idx'),
+            models.Index(fields=['company', '-call_date', '-created_at'], name='teleapo_company_fk_call_idx'),
+            GinIndex(fields=['company_name_search'], opclasses=['gin_trgm_ops'], name='teleapo_company_search_trgm'),
+        ]
 
     def __str__(self):
         return f"{self.company_name} - {self.planner} ({self.call_date})"
 
+    def save(self, *args, **kwargs):
+        self.company_name_search = normalize_company_name(self.company_name)
+        if kwargs.get('update_fields') is not None and 'company_name' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'company_name_search'}
+        if self.company_id is None and self.company_name:
+            self.company = Company.objects.filter(name=self.company_name.strip()).first()
+        super().save(*args, **kwargs)
+
 
 # ===============================
 # 案件パイプライン（かんばんボード）
@@ -667,6 +801,9 @@ class Deal(models.Model):
         verbose_name = '案件'
         verbose_name_plural = '案件一覧'
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='deal_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.client_company}) - {self.get_stage_display()}"
@@ -694,6 +831,9 @@ class DealActivity(models.Model):
         verbose_name = '案件活動履歴'
         verbose_name_plural = '案件活動履歴'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['deal', 'created_at'], name='deal_activity_deal_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.deal.title} - {self.get_activity_type_display()} ({self.created_at.strftime('%Y/%m/%d')})"
@@ -885,6 +1025,11 @@ class PartnerEngineer(models.Model):
         verbose_name = 'パートナーエンジニア'
         verbose_name_plural = 'パートナーエンジニア一覧'
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='partner_updated_at_idx'),
+            GinIndex(fields=['skills'], name='partner_skills_gin'),
+            models.Index(fields=['contract_end'], name='partner_contract_end_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name}（{self.partner_company}）"
@@ -946,6 +1091,9 @@ class PPInterview(models.Model):
         verbose_name = 'PP営業面談'
         verbose_name_plural = 'PP営業面談'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='ppinterview_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"{self.engineer_name} - {self.company_name} ({self.status})"
@@ -976,6 +1124,9 @@ class BPProspect(models.Model):
         verbose_name = 'BP見込み'
         verbose_name_plural = 'BP見込み'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='bpprospect_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"{self.company_name} - {self.engineer_name} ({self.status})"
@@ -1053,3 +1204,44 @@ class ActivityLog(models.Model):
         verbose_name_plural = "操作ログ"
         ordering = ['-created_at']
 
+
+class DeletedRecord(models.Model):
+    """削除済みレコードの記録（差分同期 updated_since 用のトゥームストーン）"""
+    target_type = models.CharField(max_length=50, verbose_name='対象種別')
+    target_id = models.BigIntegerField(verbose_name='対象ID')
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name='削除日時')
+
+    def __str__(self):
+        return f"{self.target_type}#{self.target_id} ({self.deleted_at})"
+
+    class Meta:
+        verbose_name = "削除記録"
+        verbose_name_plural = "削除記録"
+        ordering = ['-deleted_at']
+        indexes = [
+            models.Index(fields=['target_type', 'deleted_at'], name='deleted_record_type_at_idx'),
+        ]
+
+
+class EngineerStatusHistory(models.Model):
+    """エンジニアのステータス遷移履歴（追記型。ended_at が NULL の行が現在のステータス）"""
+    engineer = models.ForeignKey(Engineer, on_delete=models.CASCADE, related_name='status_history', verbose_name='エンジニア')
+    status = models.CharField(max_length=20, verbose_name='ステータス')
+    started_at = models.DateTimeField(verbose_name='開始日時')
+    ended_at = models.DateTimeField(blank=True, null=True, verbose_name='終了日時')
+
+    def __str__(self):
+        return f"{self.engineer_id} {self.status} ({self.started_at} - {self.ended_at or ''})"
+
+    class Meta:
+        verbose_name = "ステータス履歴"
+        verbose_name_plural = "ステータス履歴"
+        ordering = ['engineer', 'started_at']
+        indexes = [
+            models.Index(fields=['engineer', 'started_at'], name='status_history_engineer_idx'),
+            models.Index(fields=['status', 'started_at', 'ended_at'], name='status_history_range_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['engineer'], condition=models.Q(ended_at__isnull=True),
+                                    name='status_history_one_open_per_engineer'),
+        ]
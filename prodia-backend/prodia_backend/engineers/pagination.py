@@ -0,0 +1,50 @@
+"""
+一覧APIのページネーション
+
+既存フロントエンドは一覧APIが配列を返す前提で実装されているため、
+クエリパラメータで明示的に要求された場合のみページングする。
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    キーセット（カーソル）ページネーション
+
+    ?cursor= または ?page_size= が指定された場合のみ有効。
+    主キー（インデックス済み）で並べるため、件数が増えても OFFSET スキャンが発生しない。
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ActivityCursorPagination(CursorPagination):
+    """活動履歴（新しい順）のカーソルページネーション。(deal, created_at) インデックスで読み進める"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """
+    ページ番号ページネーション（?page= 指定時のみ有効）
+
+    ページ番号で移動する一覧画面向け。LIMIT / OFFSET と COUNT はデータベースで実行する。
+    """
+    page_size = 15
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,131 @@
+"""
+採用経路（RecruitmentChannel）の統計
+
+経路別・ステータス別の件数は (channel, status) の GROUP BY 1クエリで取得し、
+応募日時（applied_at）の週・月単位のファネル推移は条件付き集計 1クエリで算出する。
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import RecruitmentChannel
+
+BUCKETS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# 面接まで進んだとみなすステータス（不採用・辞退は到達段階が記録されないため含めない）
+INTERVIEW_REACHED = ('interview', 'hired')
+FUNNEL_OUTCOMES = ('hired', 'rejected', 'withdrawn')
+
+# bucket 指定時に date_from が無い場合の集計期間
+DEFAULT_SERIES_DAYS = 365
+
+
+def parse_day(value):
+    """YYYY-MM-DD を date に変換（不正な値は None）"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _day_start(d):
+    """日付の 0:00（現在のタイムゾーン）"""
+    return datetime.combine(d, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def applied_between(queryset, start=None, end=None):
+    """applied_at が start〜end（日付、end を含む）の応募に絞る（日時の範囲検索でインデックスを使う）"""
+    if start:
+        queryset = queryset.filter(applied_at__gte=_day_start(start))
+    if end:
+        queryset = queryset.filter(applied_at__lt=_day_start(end + timedelta(days=1)))
+    return queryset
+
+
+def _rate(numerator, denominator):
+    return round(numerator / denominator * 100, 1) if denominator else 0
+
+
+def _channel_row(name):
+    return {'name': name, 'total_applications': 0, 'hired_count': 0, 'hiring_rate': 0, 'by_status': {}}
+
+
+def channel_statistics(queryset):
+    """全体・採用経路別の応募数・採用数・採用率（ステータス別件数付き）"""
+    counts = queryset.order_by().values('channel', 'status').annotate(n=Count('id'))
+
+    by_channel = {code: _channel_row(name) for code, name in RecruitmentChannel.CHANNEL_CHOICES}
+    by_status = {code: 0 for code, _ in RecruitmentChannel.STATUS_CHOICES}
+    for row in counts:
+        stats = by_channel.setdefault(row['channel'], _channel_row(row['channel']))
+        stats['total_applications'] += row['n']
+        stats['by_status'][row['status']] = row['n']
+        by_status[row['status']] = by_status.get(row['status'], 0) + row['n']
+        if row['status'] == 'hired':
+            stats['hired_count'] += row['n']
+
+    for stats in by_channel.values():
+        stats['hiring_rate'] = _rate(stats['hired_count'], stats['total_applications'])
+
+    total = sum(by_status.values())
+    return {
+        'overall': {
+            'total_applications': total,
+            'hired_count': by_status.get('hired', 0),
+            'hiring_rate': _rate(by_status.get('hired', 0), total),
+            'by_status': by_status,
+        },
+        'by_channel': by_channel,
+    }
+
+
+def _bucket_starts(bucket, start, end):
+    """start〜end の各期間の開始日（週は月曜、月は1日）"""
+    if bucket == 'week':
+        current = start - timedelta(days=start.weekday())
+    else:
+        current = start.replace(day=1)
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current = current + timedelta(days=7) if bucket == 'week' else (current + timedelta(days=32)).replace(day=1)
+    return starts
+
+
+def funnel_series(queryset, bucket, start=None, end=None):
+    """
+    applied_at の週・月ごとのファネル（応募 → 面接 → 採用／不採用／辞退）
+    start / end は集計期間の日付（end を含む、未指定時は直近1年〜今日）。応募の無い期間も 0 件で返す。
+    """
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=DEFAULT_SERIES_DAYS)
+    rows = (
+        applied_between(queryset, start, end)
+        .annotate(period=BUCKETS[bucket]('applied_at'))
+        .order_by()
+        .values('period')
+        .annotate(
+            applied=Count('id'),
+            interview=Count('id', filter=Q(status__in=INTERVIEW_REACHED)),
+            **{outcome: Count('id', filter=Q(status=outcome)) for outcome in FUNNEL_OUTCOMES},
+        )
+    )
+    by_period = {timezone.localtime(row.pop('period')).date(): row for row in rows}
+    empty = {'applied': 0, 'interview': 0, **{outcome: 0 for outcome in FUNNEL_OUTCOMES}}
+
+    series = []
+    for period in _bucket_starts(bucket, start, end):
+        row = by_period.get(period, empty)
+        series.append({
+            'period': period.isoformat(),
+            **row,
+            'interview_rate': _rate(row['interview'], row['applied']),
+            'hiring_rate': _rate(row['hired'], row['applied']),
+        })
+    return series
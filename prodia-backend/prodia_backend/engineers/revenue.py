@@ -0,0 +1,196 @@
+"""
+月次売上サマリー（MonthlyRevenueSummary）のロールアップ
+
+Engineer（月売上 = 月単価 × 稼働率）と ProjectAssignment（参画ごとの月単価）の
+期間が重なる月を対象に、月ごとの売上・稼働人数・稼働日数を集計して保存する。
+単価・期間・ステータスが変わったときは変更前後の期間に含まれる月だけを再集計し、
+前年同月売上は保存済みの前年行から引き当てる。
+"""
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from .models import Engineer, MonthlyRevenueSummary, ProjectAssignment
+
+# 自動で再集計する過去月の範囲（それ以前は rebuild_revenue_summary コマンドで再集計）
+ROLLUP_WINDOW_MONTHS = 24
+
+# 売上に影響するフィールド（変更検知用）
+ENGINEER_REVENUE_FIELDS = (
+    'monthly_rate', 'working_rate', 'working_days_per_month',
+    'project_start_date', 'project_end_date', 'project_status',
+)
+ASSIGNMENT_REVENUE_FIELDS = ('engineer_id', 'monthly_rate', 'start_date', 'end_date', 'is_active')
+
+# 案件に就いていないステータス
+INACTIVE_PROJECT_STATUSES = ('pending', 'paused')
+
+MAX_GROWTH = 999.99
+
+
+def add_months(d, months):
+    total = d.year * 12 + d.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def current_month():
+    return timezone.localdate().replace(day=1)
+
+
+def months_in_period(start, end, window=ROLLUP_WINDOW_MONTHS):
+    """期間 [start, end]（None は無期限）に含まれる月初日の集合（集計対象期間内に限る）"""
+    last = current_month()
+    first = add_months(last, -window)
+    lower = max(start.replace(day=1), first) if start else first
+    upper = min(end.replace(day=1), last) if end else last
+    months = set()
+    while lower <= upper:
+        months.add(lower)
+        lower = add_months(lower, 1)
+    return months
+
+
+def engineer_revenue_months(values):
+    """Engineer のフィールド値（dict）から売上が計上される月"""
+    if not values or values.get('monthly_rate') is None:
+        return set()
+    return months_in_period(values.get('project_start_date'), values.get('project_end_date'))
+
+
+def assignment_revenue_months(values):
+    if not values or values.get('monthly_rate') is None:
+        return set()
+    return months_in_period(values.get('start_date'), values.get('end_date'))
+
+
+def _overlaps(start_field, end_field, month):
+    month_end = add_months(month, 1)
+    return (
+        (Q(**{f'{start_field}__isnull': True}) | Q(**{f'{start_field}__lt': month_end}))
+        & (Q(**{f'{end_field}__isnull': True}) | Q(**{f'{end_field}__gte': month}))
+    )
+
+
+def _aggregate(months):
+    """対象月ごとの {revenue, active, working_days} を条件付き集計で算出（ソースごとに1クエリ）"""
+    priced_assignments = ProjectAssignment.objects.filter(
+        engineer=OuterRef('pk'), monthly_rate__isnull=False,
+    )
+    engineers = Engineer.objects.filter(monthly_rate__isnull=False).exclude(
+        project_status__in=INACTIVE_PROJECT_STATUSES,
+    ).exclude(
+        project_status='ended', project_end_date__isnull=True,
+    )
+    assignments = ProjectAssignment.objects.filter(monthly_rate__isnull=False).exclude(
+        is_active=False, end_date__isnull=True,
+    )
+    assignment_revenue = ExpressionWrapper(
+        F('monthly_rate') * F('engineer__working_rate'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+    engineer_aggs, assignment_aggs = {}, {}
+    for month in months:
+        key = month.strftime('%Y%m')
+        # その月に単価付きの参画情報がある人は参画情報側で計上する（二重計上しない）
+        in_month = _overlaps('project_start_date', 'project_end_date', month) & ~Exists(
+            priced_assignments.filter(_overlaps('start_date', 'end_date', month)))
+        engineer_aggs[f'revenue_{key}'] = Sum('monthly_revenue', filter=in_month)
+        engineer_aggs[f'active_{key}'] = Count('id', filter=in_month)
+        engineer_aggs[f'days_{key}'] = Sum('working_days_per_month', filter=in_month)
+        in_month = _overlaps('start_date', 'end_date', month)
+        assignment_aggs[f'revenue_{key}'] = Sum(assignment_revenue, filter=in_month)
+        assignment_aggs[f'active_{key}'] = Count('engineer', filter=in_month, distinct=True)
+        assignment_aggs[f'days_{key}'] = Sum('engineer__working_days_per_month', filter=in_month)
+
+    engineer_stats = engineers.aggregate(**engineer_aggs)
+    assignment_stats = assignments.aggregate(**assignment_aggs)
+
+    results = {}
+    for month in months:
+        key = month.strftime('%Y%m')
+        results[month] = {
+            name: int(round(engineer_stats[f'{name}_{key}'] or 0) + round(assignment_stats[f'{name}_{key}'] or 0))
+            for name in ('revenue', 'active', 'days')
+        }
+    return results
+
+
+def _apply_calculations(summary):
+    """MonthlyRevenueSummary.save() と同じ計算値を設定（bulk 保存用）"""
+    actual = summary.actual_revenue
+    summary.revenue_per_engineer = round(actual / summary.active_engineers) if summary.active_engineers else 0
+    summary.average_daily_revenue = round(actual / summary.total_working_days) if summary.total_working_days else 0
+    growth = summary.calculate_growth_rate() if summary.previous_year_revenue is not None else None
+    if growth is not None:
+        growth = max(-MAX_GROWTH, min(MAX_GROWTH, float(growth)))
+    summary.year_over_year_growth = growth
+
+
+def refresh_months(months):
+    """指定月のサマリーを再集計して保存し、翌年同月行の前年比も更新する"""
+    months = sorted({m.replace(day=1) for m in months})
+    if not months:
+        return []
+    stats = _aggregate(months)
+
+    neighbours = {add_months(m, -12) for m in months} | {add_months(m, 12) for m in months}
+    stored = {
+        s.year_month: s
+        for s in MonthlyRevenueSummary.objects.filter(year_month__in=neighbours - set(months))
+    }
+
+    summaries = {}
+    for month in months:
+        summaries[month] = MonthlyRevenueSummary(
+            year_month=month,
+            actual_revenue=stats[month]['revenue'],
+            active_engineers=stats[month]['active'],
+            total_working_days=stats[month]['days'],
+        )
+    for month, summary in summaries.items():
+        previous = summaries.get(add_months(month, -12)) or stored.get(add_months(month, -12))
+        summary.previous_year_revenue = previous.actual_revenue if previous else None
+        _apply_calculations(summary)
+    # 翌年同月の行が保存済みなら前年同月売上を差し替える
+    for month in months:
+        following = stored.get(add_months(month, 12))
+        if following is not None:
+            following.previous_year_revenue = summaries[month].actual_revenue
+            _apply_calculations(following)
+            summaries[following.year_month] = following
+
+    rows = list(summaries.values())
+    MonthlyRevenueSummary.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['year_month'],
+        update_fields=[
+            'actual_revenue', 'active_engineers', 'total_working_days',
+            'average_daily_revenue', 'revenue_per_engineer',
+            'previous_year_revenue', 'year_over_year_growth', 'updated_at',
+        ],
+    )
+    return rows
+
+
+def schedule_refresh(months):
+    """トランザクション確定後に指定月を再集計"""
+    months = set(months)
+    if months:
+        transaction.on_commit(lambda: refresh_months(months))
+
+
+def ensure_current_month():
+    """当月の行が無ければ作成（月替わり直後のアクセス用）"""
+    month = current_month()
+    if not MonthlyRevenueSummary.objects.filter(year_month=month).exists():
+        refresh_months([month])
+
+
+def rebuild(window=ROLLUP_WINDOW_MONTHS):
+    """直近 window ヶ月分を全て再集計"""
+    last = current_month()
+    return refresh_months(add_months(last, -i) for i in range(window + 1))
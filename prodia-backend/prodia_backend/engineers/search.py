@@ -0,0 +1,45 @@
+"""
+企業名のあいまい検索（pg_trgm）
+
+企業名は表記ゆれ（株式会社・(株) の有無、全角／半角、空白）を吸収した正規化名を
+検索用カラム（Company.search_name / TeleapoRecord.company_name_search）に保存し、
+gin_trgm_ops の GIN インデックスで部分一致と単語類似度（word_similarity）の両方を検索する。
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, Q, Value
+
+# 法人格の表記（NFKC 正規化後。㈱・（株） は (株) になる）
+LEGAL_ENTITY_RE = re.compile(
+    r'株式会社|有限会社|合同会社|合資会社|合名会社|'
+    r'一般社団法人|一般財団法人|公益社団法人|公益財団法人|特定非営利活動法人|'
+    r'\((?:株|有|同|資|名|社|財)\)'
+)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_company_name(value):
+    """検索用の正規化名（全角英数・半角カナを NFKC で統一し、法人格と空白を除いて小文字化）"""
+    text = unicodedata.normalize('NFKC', value or '')
+    text = LEGAL_ENTITY_RE.sub('', text)
+    return WHITESPACE_RE.sub('', text).lower()
+
+
+def fuzzy_search(queryset, field, query):
+    """
+    正規化済みの検索用カラム field を query で検索し、類似度（similarity）を付与して返す
+    部分一致（LIKE '%...%'）と単語類似度（%>、閾値は pg_trgm.word_similarity_threshold）は
+    どちらもトライグラム GIN インデックスを使う。
+    並び替えは呼び出し側で行う（例: order_by('-similarity', 'name')）。
+    """
+    normalized = normalize_company_name(query)
+    if not normalized:
+        # 法人格だけの検索語などは絞り込まない
+        return queryset.annotate(similarity=Value(0.0, output_field=FloatField()))
+    return queryset.filter(
+        Q(**{f'{field}__contains': normalized}) | Q(**{f'{field}__trigram_word_similar': normalized})
+    ).annotate(
+        similarity=TrigramWordSimilarity(normalized, field),
+    )
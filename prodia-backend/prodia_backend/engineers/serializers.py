@@ -1,5 +1,20 @@
 from rest_framework import serializers
-from .models import Engineer, SkillSheet, SalesMemo, MemoAttachment, Interview, RecruitmentChannel, SocialMediaPost, Company, CompanyAppointment, Deal, DealActivity, Project, ProjectAssignment, PartnerEngineer, TeleapoRecord, MonthlyProjectReport, PPInterview, BPProspect, CalendarEvent, ActivityLog
+from .models import Engineer, SkillSheet, SalesMemo, MemoAttachment, Interview, RecruitmentChannel, SocialMediaPost, Company, CompanyAppointment, Deal, DealActivity, Project, ProjectAssignment, PartnerEngineer, TeleapoRecord, MonthlyProjectReport, PPInterview, BPProspect, CalendarEvent, ActivityLog, RevenueForecast, MonthlyRevenueSummary
+
+class SparseFieldsetSerializerMixin:
+    """fields / exclude 引数で出力フィールドを絞り込むシリアライザ Mixin"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if exclude:
+            for name in set(exclude) & set(self.fields):
+                self.fields.pop(name)
+
 
 # SkillSheet用シリアライザ
 class SkillSheetSerializer(serializers.ModelSerializer):
@@ -10,16 +25,22 @@ class SkillSheetSerializer(serializers.ModelSerializer):
         model = SkillSheet
         fields = '__all__'
 
-class EngineerSerializer(serializers.ModelSerializer):
+class EngineerSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Engineer
         fields = '__all__'
 
+
+class EngineerImportSerializer(EngineerSerializer):
+    """CSV一括登録用（メールアドレス重複はビュー側で一括チェックするため UniqueValidator を外す）"""
+    class Meta(EngineerSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
 # 営業メモシリアライザ
 class SalesMemoSerializer(serializers.ModelSerializer):
     class Meta:
         model = SalesMemo
-        fields = '__all__'
+        exclude = ['search_vector']
         
     def create(self, validated_data):
         # タグが文字列で送られてきた場合の処理
@@ -78,16 +99,33 @@ class SocialMediaPostSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class SocialMetricIngestSerializer(serializers.Serializer):
+    """指標スナップショットの一括登録（1件分）。省略した指標は投稿の現在値を使う"""
+    post_id = serializers.CharField(max_length=100)
+    captured_at = serializers.DateTimeField(required=False)
+    likes_count = serializers.IntegerField(required=False, min_value=0)
+    comments_count = serializers.IntegerField(required=False, min_value=0)
+    shares_count = serializers.IntegerField(required=False, min_value=0)
+    views_count = serializers.IntegerField(required=False, min_value=0)
+    impressions = serializers.IntegerField(required=False, min_value=0)
+    reach = serializers.IntegerField(required=False, min_value=0)
+
+
 # 企業マスターシリアライザ
 class CompanySerializer(serializers.ModelSerializer):
     active_appointment = serializers.SerializerMethodField()
 
     class Meta:
         model = Company
-        fields = '__all__'
+        exclude = ['search_name']
 
     def get_active_appointment(self, obj):
-        apt = obj.appointments.filter(status='scheduled').first()
+        # CompanyViewSet は予定中アポを1件ずつ prefetch 済み（scheduled_appointments）
+        scheduled = getattr(obj, 'scheduled_appointments', None)
+        if scheduled is not None:
+            apt = scheduled[0] if scheduled else None
+        else:
+            apt = obj.appointments.filter(status='scheduled').first()
         if apt:
             return {
                 'id': apt.id,
@@ -121,10 +159,18 @@ class DealActivitySerializer(serializers.ModelSerializer):
 
 
 class DealSerializer(serializers.ModelSerializer):
+    """
+    案件（活動履歴は最新 RECENT_ACTIVITY_COUNT 件と総件数のみ。全件は /deals/{id}/activities/ で取得）
+
+    recent_activities（Prefetch の to_attr）と activity_count（annotate）があればそれを使う。
+    """
+    RECENT_ACTIVITY_COUNT = 5
+
     stage_display = serializers.ReadOnlyField(source='get_stage_display')
     priority_display = serializers.ReadOnlyField(source='get_priority_display')
     proposed_engineer_names = serializers.SerializerMethodField()
-    activities = DealActivitySerializer(many=True, read_only=True)
+    activities = serializers.SerializerMethodField()
+    activity_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Deal
@@ -133,6 +179,41 @@ class DealSerializer(serializers.ModelSerializer):
     def get_proposed_engineer_names(self, obj):
         return [{'id': e.id, 'name': e.name} for e in obj.proposed_engineers.all()]
 
+    def get_activities(self, obj):
+        recent = getattr(obj, 'recent_activities', None)
+        if recent is None:
+            recent = obj.activities.order_by('-created_at')[:self.RECENT_ACTIVITY_COUNT]
+        return DealActivitySerializer(recent, many=True).data
+
+    def get_activity_count(self, obj):
+        count = getattr(obj, 'activity_count', None)
+        return count if count is not None else obj.activities.count()
+
+
+class DealCardSerializer(serializers.ModelSerializer):
+    """かんばんカード用（活動履歴は件数のみ。activity_count は annotate 済みの値を使う）"""
+    stage_display = serializers.ReadOnlyField(source='get_stage_display')
+    priority_display = serializers.ReadOnlyField(source='get_priority_display')
+    proposed_engineer_names = serializers.SerializerMethodField()
+    activity_count = serializers.IntegerField(read_only=True)
+
+    CARD_FIELDS = [
+        'id', 'title', 'client_company', 'stage', 'priority', 'description',
+        'expected_monthly_rate', 'win_probability', 'assigned_to',
+        'next_action_date', 'updated_at',
+    ]
+
+    class Meta:
+        model = Deal
+        fields = [
+            'id', 'title', 'client_company', 'stage', 'stage_display', 'priority', 'priority_display',
+            'description', 'expected_monthly_rate', 'win_probability', 'assigned_to',
+            'next_action_date', 'updated_at', 'proposed_engineer_names', 'activity_count',
+        ]
+
+    def get_proposed_engineer_names(self, obj):
+        return [{'id': e.id, 'name': e.name} for e in obj.proposed_engineers.all()]
+
 
 # ===============================
 # 元請案件管理（参画中プロジェクト）
@@ -159,11 +240,16 @@ class ProjectSerializer(serializers.ModelSerializer):
         model = Project
         fields = '__all__'
 
+    # ProjectViewSet は engineer_count / active_engineer_count を annotate 済み
     def get_engineer_count(self, obj):
-        return obj.assignments.count()
+        count = getattr(obj, 'engineer_count', None)
+        return count if count is not None else len(obj.assignments.all())
 
     def get_active_engineer_count(self, obj):
-        return obj.assignments.filter(is_active=True).count()
+        count = getattr(obj, 'active_engineer_count', None)
+        if count is not None:
+            return count
+        return sum(1 for a in obj.assignments.all() if a.is_active)
 
 
 # ===============================
@@ -186,7 +272,14 @@ class TeleapoRecordSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TeleapoRecord
-        fields = '__all__'
+        exclude = ['company_name_search']
+
+    def update(self, instance, validated_data):
+        # 企業名だけが変更された場合は保存時に企業マスターへ紐付け直す
+        if 'company_name' in validated_data and 'company' not in validated_data \
+                and validated_data['company_name'] != instance.company_name:
+            validated_data['company'] = None
+        return super().update(instance, validated_data)
 
 
 class MonthlyProjectReportSerializer(serializers.ModelSerializer):
@@ -220,3 +313,16 @@ class ActivityLogSerializer(serializers.ModelSerializer):
         model = ActivityLog
         fields = '__all__'
         read_only_fields = ['created_at']
+
+
+class RevenueForecastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RevenueForecast
+        fields = '__all__'
+        read_only_fields = ['created_by', 'created_at', 'updated_at']
+
+
+class MonthlyRevenueSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MonthlyRevenueSummary
+        fields = '__all__'
@@ -0,0 +1,133 @@
+"""
+モデルシグナルハンドラ
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import (
+    Engineer, PartnerEngineer, Deal, BPProspect, PPInterview, DeletedRecord, ProjectAssignment,
+    Company, TeleapoRecord, SocialMediaPost,
+)
+from .revenue import (
+    ASSIGNMENT_REVENUE_FIELDS, ENGINEER_REVENUE_FIELDS,
+    assignment_revenue_months, engineer_revenue_months, schedule_refresh,
+)
+from . import sns_snapshots, sns_stats
+
+# 差分同期（?updated_since=）対象モデル
+DELTA_SYNC_MODELS = (Engineer, PartnerEngineer, Deal, BPProspect, PPInterview)
+
+
+def record_deletion(sender, instance, **kwargs):
+    """削除されたレコードのIDをトゥームストーンとして記録"""
+    DeletedRecord.objects.create(target_type=sender._meta.model_name, target_id=instance.pk)
+
+
+for _model in DELTA_SYNC_MODELS:
+    post_delete.connect(record_deletion, sender=_model, dispatch_uid=f'tombstone_{_model._meta.model_name}')
+
+
+# ── 月次売上サマリーの差分再集計 ──
+
+def _field_values(instance, fields):
+    return {name: getattr(instance, name) for name in fields}
+
+
+def _engineer_months(engineer_id, values):
+    """エンジニア本体の期間と、単価付き参画情報の期間に含まれる月"""
+    months = engineer_revenue_months(values)
+    for assignment in ProjectAssignment.objects.filter(engineer_id=engineer_id).values(*ASSIGNMENT_REVENUE_FIELDS):
+        months |= assignment_revenue_months(assignment)
+    return months
+
+
+def _remember_previous(fields):
+    def handler(sender, instance, **kwargs):
+        instance._revenue_previous = None
+        if instance.pk and not instance._state.adding:
+            instance._revenue_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    return handler
+
+
+def engineer_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_revenue_previous', None)
+    current = _field_values(instance, ENGINEER_REVENUE_FIELDS)
+    if previous == current:
+        return
+    months = engineer_revenue_months(previous) | _engineer_months(instance.pk, current)
+    schedule_refresh(months)
+
+
+def engineer_deleted(sender, instance, **kwargs):
+    schedule_refresh(engineer_revenue_months(_field_values(instance, ENGINEER_REVENUE_FIELDS)))
+
+
+def _assignment_months(engineer_id, *values):
+    months = set()
+    for v in values:
+        months |= assignment_revenue_months(v)
+    # 単価付き参画情報の有無でエンジニア本体側の計上有無が切り替わる
+    engineer = Engineer.objects.filter(pk=engineer_id).values(*ENGINEER_REVENUE_FIELDS).first()
+    return months | engineer_revenue_months(engineer)
+
+
+def assignment_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_revenue_previous', None)
+    current = _field_values(instance, ASSIGNMENT_REVENUE_FIELDS)
+    if previous == current:
+        return
+    schedule_refresh(_assignment_months(instance.engineer_id, previous, current))
+
+
+def assignment_deleted(sender, instance, **kwargs):
+    current = _field_values(instance, ASSIGNMENT_REVENUE_FIELDS)
+    schedule_refresh(_assignment_months(instance.engineer_id, current))
+
+
+pre_save.connect(_remember_previous(ENGINEER_REVENUE_FIELDS), sender=Engineer, weak=False,
+                 dispatch_uid='revenue_engineer_previous')
+post_save.connect(engineer_saved, sender=Engineer, dispatch_uid='revenue_engineer_saved')
+post_delete.connect(engineer_deleted, sender=Engineer, dispatch_uid='revenue_engineer_deleted')
+pre_save.connect(_remember_previous(ASSIGNMENT_REVENUE_FIELDS), sender=ProjectAssignment, weak=False,
+                 dispatch_uid='revenue_assignment_previous')
+post_save.connect(assignment_saved, sender=ProjectAssignment, dispatch_uid='revenue_assignment_saved')
+post_delete.connect(assignment_deleted, sender=ProjectAssignment, dispatch_uid='revenue_assignment_deleted')
+
+
+# ── テレアポ記録と企業マスターの紐付け ──
+
+def company_saved(sender, instance, created, **kwargs):
+    """企業の登録時に、同名で未紐付けのテレアポ記録を紐付ける"""
+    if created:
+        TeleapoRecord.objects.filter(company__isnull=True, company_name=instance.name).update(company=instance)
+
+
+post_save.connect(company_saved, sender=Company, dispatch_uid='teleapo_company_saved')
+
+
+# ── SNS日別集計の差分再集計・指標スナップショットの記録 ──
+
+def social_post_previous(sender, instance, **kwargs):
+    instance._daily_previous = None
+    instance._metrics_previous = None
+    if instance.pk and not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values('posted_at', 'platform', *sns_stats.METRICS).first()
+        if previous:
+            instance._daily_previous = (timezone.localdate(previous['posted_at']), previous['platform'])
+            instance._metrics_previous = {metric: previous[metric] for metric in sns_stats.METRICS}
+
+
+def social_post_saved(sender, instance, created, **kwargs):
+    sns_stats.schedule_refresh({getattr(instance, '_daily_previous', None), sns_stats.daily_key(instance)})
+    # 指標が変わったときだけスナップショットを追記する
+    if created or getattr(instance, '_metrics_previous', None) != _field_values(instance, sns_stats.METRICS):
+        sns_snapshots.record_snapshots([instance])
+
+
+def social_post_deleted(sender, instance, **kwargs):
+    sns_stats.schedule_refresh({sns_stats.daily_key(instance)})
+
+
+pre_save.connect(social_post_previous, sender=SocialMediaPost, dispatch_uid='sns_daily_previous')
+post_save.connect(social_post_saved, sender=SocialMediaPost, dispatch_uid='sns_daily_saved')
+post_delete.connect(social_post_deleted, sender=SocialMediaPost, dispatch_uid='sns_daily_deleted')
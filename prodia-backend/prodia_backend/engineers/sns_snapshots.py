@@ -0,0 +1,219 @@
+"""
+SNS投稿のエンゲージメント指標スナップショット（SocialMediaMetricSnapshot）
+
+SocialMediaPost の指標は同期のたびに上書きされるため、取得時点の値を追記のみのテーブルに
+記録して成長曲線を再現できるようにする。古い記録は downsample() で
+1時間ごと → 1日ごとの最終値に間引く（指標は累計値なので各区間の最終値だけで推移を表せる）。
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber, Trunc
+from django.utils import timezone
+
+from .models import SocialMediaMetricSnapshot, SocialMediaPost
+from .sns_stats import METRICS, schedule_refresh
+
+# 取得時点の記録を残す期間と、1時間ごとの記録を残す期間（それより古いものは1日ごと）
+RAW_RETENTION = timedelta(days=7)
+HOURLY_RETENTION = timedelta(days=90)
+
+INTERVALS = ('raw', 'hour', 'day')
+# 範囲検索で返す区間数の上限
+MAX_POINTS = 2000
+BATCH_SIZE = 1000
+
+
+def _snapshot(post, captured_at, values=None):
+    values = values or {}
+    return SocialMediaMetricSnapshot(
+        post=post, platform=post.platform, captured_at=captured_at,
+        **{metric: values.get(metric, getattr(post, metric)) for metric in METRICS},
+    )
+
+
+def record_snapshots(posts, at=None):
+    """投稿の現在の指標をまとめて記録（同一投稿・同一時刻の記録は無視）"""
+    at = at or timezone.now()
+    SocialMediaMetricSnapshot.objects.bulk_create(
+        [_snapshot(post, at) for post in posts], batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def ingest(items):
+    """
+    同期処理で取得した指標をまとめて記録し、投稿の現在値を最新の指標で更新する
+    items: [{post_id（SNS側の投稿ID）, captured_at（省略時は現在）, likes_count, views_count, ...}]
+    省略した指標は投稿の現在値を使う。返り値: (受け付けた件数, 見つからなかった post_id)
+    同一投稿・同一時刻の記録が既にある場合は無視する。
+    """
+    now = timezone.now()
+    posts = SocialMediaPost.objects.in_bulk({item['post_id'] for item in items}, field_name='post_id')
+    stored_latest = dict(
+        SocialMediaMetricSnapshot.objects.filter(post__in=[p.pk for p in posts.values()])
+        .order_by().values('post').annotate(latest=Max('captured_at')).values_list('post', 'latest')
+    )
+
+    snapshots, newest, unknown = [], {}, []
+    for item in items:
+        post = posts.get(item['post_id'])
+        if post is None:
+            unknown.append(item['post_id'])
+            continue
+        snapshot = _snapshot(post, item.get('captured_at') or now, item)
+        snapshots.append(snapshot)
+        if post.pk not in newest or snapshot.captured_at > newest[post.pk].captured_at:
+            newest[post.pk] = snapshot
+
+    # 既存の記録より新しい指標だけを投稿の現在値に反映する
+    updated = []
+    for post_id, snapshot in newest.items():
+        latest = stored_latest.get(post_id)
+        if latest is not None and snapshot.captured_at <= latest:
+            continue
+        post = snapshot.post
+        for metric in METRICS:
+            setattr(post, metric, getattr(snapshot, metric))
+        post.update_engagement_rate()
+        post.last_synced_at = now
+        updated.append(post)
+
+    with transaction.atomic():
+        SocialMediaMetricSnapshot.objects.bulk_create(snapshots, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        SocialMediaPost.objects.bulk_update(
+            updated, [*METRICS, 'engagement_rate', 'last_synced_at'], batch_size=BATCH_SIZE,
+        )
+        # bulk_update はシグナルを発行しないため日別集計を明示的に再計算する
+        schedule_refresh({(timezone.localdate(post.posted_at), post.platform) for post in updated})
+    return len(snapshots), sorted(set(unknown))
+
+
+# ── 間引き ──
+
+def _floor(dt, unit):
+    """現在のタイムゾーンで時・日の区切りに切り捨て"""
+    local = timezone.localtime(dt)
+    if unit == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    return datetime.combine(local.date(), time.min, tzinfo=local.tzinfo)
+
+
+def _downsample(unit, sources, cutoff):
+    # 区切りで切り捨てた cutoff より前の区間は全て完結しているため、既に間引いた区間と混ざらない
+    snapshots = SocialMediaMetricSnapshot.objects.filter(
+        resolution__in=sources, captured_at__lt=_floor(cutoff, unit),
+    )
+    # 投稿×区間（現在のタイムゾーン）ごとの最終の記録
+    keepers = snapshots.annotate(
+        rn=Window(
+            RowNumber(),
+            partition_by=[F('post'), Trunc('captured_at', unit)],
+            order_by=F('captured_at').desc(),
+        ),
+    ).filter(rn=1).values('id')
+    removed, _ = snapshots.exclude(id__in=keepers).delete()
+    kept = snapshots.filter(id__in=keepers).update(resolution=unit)
+    return {'removed': removed, 'kept': kept}
+
+
+@transaction.atomic
+def downsample(now=None):
+    """RAW_RETENTION より古い記録を1時間ごと、HOURLY_RETENTION より古い記録を1日ごとの最終値に間引く"""
+    now = now or timezone.now()
+    return {
+        'hour': _downsample('hour', ['raw'], now - RAW_RETENTION),
+        'day': _downsample('day', ['raw', 'hour'], now - HOURLY_RETENTION),
+    }
+
+
+# ── 範囲検索 ──
+
+def _bucket_starts(start, end, interval):
+    current = _floor(start, interval)
+    starts = []
+    while current < end:
+        starts.append(current)
+        if interval == 'hour':
+            current += timedelta(hours=1)
+        else:
+            current = datetime.combine(current.date() + timedelta(days=1), time.min, tzinfo=current.tzinfo)
+    return starts
+
+
+def bucket_count(start, end, interval):
+    """start 以上 end 未満の区間数（範囲の上限チェック用。区間の一覧は作らずに算出する）"""
+    if interval == 'raw':
+        return 0
+    unit = timedelta(hours=1) if interval == 'hour' else timedelta(days=1)
+    return -(-(end - _floor(start, interval)) // unit)
+
+
+def _point(at, row):
+    return {'at': at, **{metric: row[metric] for metric in METRICS}}
+
+
+def post_series(post, start, end, interval='day'):
+    """
+    投稿1件の指標推移（start 以上 end 未満）
+    interval が hour / day の場合は区間ごとの最終値、raw の場合は記録そのもの
+    """
+    snapshots = post.metric_snapshots.filter(captured_at__gte=start, captured_at__lt=end)
+    if interval == 'raw':
+        return [_point(row['captured_at'], row)
+                for row in snapshots.order_by('captured_at').values('captured_at', *METRICS)]
+    rows = (
+        snapshots.annotate(bucket=Trunc('captured_at', interval))
+        .order_by('bucket', '-captured_at')
+        .distinct('bucket')
+        .values('bucket', *METRICS)
+    )
+    return [_point(row['bucket'], row) for row in rows]
+
+
+def platform_series(start, end, interval='day', platform=None):
+    """
+    プラットフォーム別の指標合計の推移（区間ごと。記録の無い投稿は直前の値を引き継ぐ）
+    投稿×区間ごとの最終値と、期間開始前の各投稿の最終値の2クエリで算出する。
+    """
+    snapshots = SocialMediaMetricSnapshot.objects.all()
+    if platform:
+        snapshots = snapshots.filter(platform=platform)
+    baseline = (
+        snapshots.filter(captured_at__lt=start)
+        .order_by('post', '-captured_at').distinct('post')
+        .values('post', 'platform', *METRICS)
+    )
+    rows = (
+        snapshots.filter(captured_at__gte=start, captured_at__lt=end)
+        .annotate(bucket=Trunc('captured_at', interval))
+        .order_by('bucket', 'post', '-captured_at').distinct('bucket', 'post')
+        .values('bucket', 'post', 'platform', *METRICS)
+    )
+
+    # 投稿ごとの現在値を差し替えながらプラットフォーム別の合計を更新する
+    platforms = [platform] if platform else [code for code, _ in SocialMediaPost.PLATFORM_CHOICES]
+    totals = {name: dict.fromkeys(METRICS, 0) for name in platforms}
+    current = {}
+
+    def apply(row):
+        total = totals.setdefault(row['platform'], dict.fromkeys(METRICS, 0))
+        previous = current.get(row['post'])
+        for metric in METRICS:
+            total[metric] += row[metric] - (previous[metric] if previous else 0)
+        current[row['post']] = row
+
+    for row in baseline:
+        apply(row)
+
+    by_bucket = {}
+    for row in rows:
+        by_bucket.setdefault(timezone.localtime(row['bucket']), []).append(row)
+
+    series = {name: [] for name in totals}
+    for bucket in _bucket_starts(start, end, interval):
+        for row in by_bucket.get(bucket, []):
+            apply(row)
+        for name, total in totals.items():
+            series.setdefault(name, []).append({'at': bucket, **total})
+    return series
@@ -0,0 +1,172 @@
+"""
+SNS投稿（SocialMediaPost）の集計
+
+全体・プラットフォーム別の合計と平均エンゲージメント率は GROUP BY platform の1クエリで算出する。
+グラフ用の日別推移は投稿日・プラットフォームごとの集計テーブル（SocialMediaDailyStat）から読み、
+投稿の保存・削除時は該当する（投稿日, プラットフォーム）の行だけを再集計する。
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import SocialMediaDailyStat, SocialMediaPost
+
+METRICS = ('views_count', 'likes_count', 'comments_count', 'shares_count', 'impressions', 'reach')
+
+# 日別推移の既定期間
+DEFAULT_DAILY_DAYS = 90
+
+
+def _post_aggregates():
+    return {
+        'posts_count': Count('id'),
+        **{metric: Sum(metric) for metric in METRICS},
+        'engagement_rate_sum': Sum('engagement_rate'),
+    }
+
+
+def _platform_summary(row):
+    posts = row['posts_count'] or 0
+    return {
+        'posts_count': posts,
+        'total_views': row['views_count'] or 0,
+        'total_likes': row['likes_count'] or 0,
+        'total_comments': row['comments_count'] or 0,
+        'total_shares': row['shares_count'] or 0,
+        'total_impressions': row['impressions'] or 0,
+        'total_reach': row['reach'] or 0,
+        'avg_engagement': round(float(row['engagement_rate_sum'] or 0) / posts, 2) if posts else 0,
+    }
+
+
+def summarize(rows):
+    """
+    プラットフォームごとの集計行（posts_count・各指標・engagement_rate_sum）から
+    analytics 形式の {overall, by_platform} を作る（投稿のあるプラットフォームのみ）
+    """
+    names = dict(SocialMediaPost.PLATFORM_CHOICES)
+    totals = {'posts_count': 0, 'engagement_rate_sum': 0, **{metric: 0 for metric in METRICS}}
+    by_platform = {}
+    for row in rows:
+        if not row['posts_count']:
+            continue
+        by_platform[row['platform']] = {'name': names.get(row['platform'], row['platform']), **_platform_summary(row)}
+        for key in totals:
+            totals[key] += row[key] or 0
+
+    overall = _platform_summary(totals)
+    overall['total_posts'] = overall.pop('posts_count')
+    overall['avg_engagement_rate'] = overall.pop('avg_engagement')
+    return {'overall': overall, 'by_platform': by_platform}
+
+
+def platform_totals(queryset):
+    """投稿のクエリセットを GROUP BY platform で集計（1クエリ）"""
+    return summarize(queryset.order_by().values('platform').annotate(**_post_aggregates()))
+
+
+# ── 日別集計テーブル ──
+
+def _day_start(d):
+    return datetime.combine(d, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def _daily_rows(posts):
+    """投稿日（現在のタイムゾーン）・プラットフォームごとの集計値"""
+    return (
+        posts.annotate(date=TruncDate('posted_at'))
+        .order_by()
+        .values('date', 'platform')
+        .annotate(**_post_aggregates())
+    )
+
+
+def _save_daily(rows):
+    SocialMediaDailyStat.objects.bulk_create(
+        [SocialMediaDailyStat(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=['date', 'platform'],
+        update_fields=['posts_count', *METRICS, 'engagement_rate_sum', 'updated_at'],
+    )
+
+
+def daily_key(post):
+    """投稿が計上される（投稿日, プラットフォーム）"""
+    if post.posted_at is None:
+        return None
+    return timezone.localdate(post.posted_at), post.platform
+
+
+def refresh_daily_stats(keys):
+    """指定した（投稿日, プラットフォーム）の日別集計を再計算する（投稿が無くなった行は削除）"""
+    keys = {key for key in keys if key}
+    if not keys:
+        return
+    dates = [d for d, _ in keys]
+    posts = SocialMediaPost.objects.filter(
+        posted_at__gte=_day_start(min(dates)),
+        posted_at__lt=_day_start(max(dates) + timedelta(days=1)),
+        platform__in={platform for _, platform in keys},
+    )
+    rows = [row for row in _daily_rows(posts) if (row['date'], row['platform']) in keys]
+    with transaction.atomic():
+        _save_daily(rows)
+        for d, platform in keys - {(row['date'], row['platform']) for row in rows}:
+            SocialMediaDailyStat.objects.filter(date=d, platform=platform).delete()
+
+
+def schedule_refresh(keys):
+    """トランザクション確定後に指定した日別集計を再計算"""
+    keys = {key for key in keys if key}
+    if keys:
+        transaction.on_commit(lambda: refresh_daily_stats(keys))
+
+
+def rebuild():
+    """日別集計を全件作り直す"""
+    rows = list(_daily_rows(SocialMediaPost.objects.all()))
+    with transaction.atomic():
+        SocialMediaDailyStat.objects.all().delete()
+        _save_daily(rows)
+    return len(rows)
+
+
+def daily_series(start, end, platform=None):
+    """
+    日別集計テーブルから期間内（start〜end、end を含む）の推移と期間合計を返す（投稿行は参照しない）
+    series は日付・プラットフォームごとの行（投稿の無い日は含まない）
+    """
+    stats = SocialMediaDailyStat.objects.filter(date__gte=start, date__lte=end)
+    if platform:
+        stats = stats.filter(platform=platform)
+    rows = list(stats.order_by('date', 'platform').values(
+        'date', 'platform', 'posts_count', *METRICS, 'engagement_rate_sum',
+    ))
+
+    per_platform = {}
+    for row in rows:
+        total = per_platform.setdefault(row['platform'], {
+            'platform': row['platform'], 'posts_count': 0, 'engagement_rate_sum': 0,
+            **{metric: 0 for metric in METRICS},
+        })
+        for key in ('posts_count', 'engagement_rate_sum', *METRICS):
+            total[key] += row[key]
+
+    return {
+        'range': {'from': start, 'to': end},
+        **summarize(per_platform.values()),
+        'series': [
+            {
+                'date': row['date'],
+                'platform': row['platform'],
+                'posts_count': row['posts_count'],
+                **{metric: row[metric] for metric in METRICS},
+                'avg_engagement': round(float(row['engagement_rate_sum']) / row['posts_count'], 2)
+                if row['posts_count'] else 0,
+            }
+            for row in rows
+        ],
+    }
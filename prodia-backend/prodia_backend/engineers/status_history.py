@@ -0,0 +1,126 @@
+"""
+エンジニアのステータス遷移履歴（EngineerStatusHistory）と待機期間の分析
+
+ステータスが変わるたびに現在の行（ended_at IS NULL）を閉じて新しい行を追加する。
+分析は (status, started_at, ended_at) インデックスを使った期間の範囲検索で行う。
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Avg, Count, DurationField, Exists, ExpressionWrapper, F, Max, OuterRef, Q
+from django.utils import timezone
+
+from .models import EngineerStatusHistory
+
+WAITING = '未アサイン'
+ASSIGNED = 'アサイン済'
+
+
+def record_status_change(engineer, new_status, at=None):
+    """ステータスが変わっていれば履歴を閉じて新しい行を追加（呼び出し側のトランザクション内で実行する）"""
+    at = at or timezone.now()
+    current = (EngineerStatusHistory.objects.select_for_update()
+               .filter(engineer=engineer, ended_at__isnull=True).first())
+    if current is not None:
+        if current.status == new_status:
+            return current
+        current.ended_at = at
+        current.save(update_fields=['ended_at'])
+    return EngineerStatusHistory.objects.create(engineer=engineer, status=new_status, started_at=at)
+
+
+def open_histories(engineers, at=None):
+    """新規登録エンジニアの初期行（bulk_create 用）"""
+    at = at or timezone.now()
+    return [
+        EngineerStatusHistory(engineer=e, status=e.engineer_status, started_at=at)
+        for e in engineers if e.engineer_status
+    ]
+
+
+def _days(duration):
+    return round(duration.total_seconds() / 86400, 1) if duration else None
+
+
+def _month_bounds(today, months):
+    """today の月を含む直近 months ヶ月の [月初, 翌月初) を古い順に返す（aware datetime）"""
+    first = today.replace(day=1)
+    bounds = []
+    for _ in range(months):
+        next_first = (first + timedelta(days=32)).replace(day=1)
+        bounds.append((first, next_first))
+        first = (first - timedelta(days=1)).replace(day=1)
+    tz = timezone.get_current_timezone()
+    return [
+        (datetime.combine(a, time.min, tzinfo=tz), datetime.combine(b, time.min, tzinfo=tz))
+        for a, b in reversed(bounds)
+    ]
+
+
+def waiting_analytics(months=12, today=None):
+    """
+    待機（未アサイン）期間の分析
+
+    bench_time     : 期間内に終了した待機期間の平均・最大日数と、現在待機中の人数・平均経過日数
+    time_to_assign : 待機 → アサイン済 に遷移した待機期間の平均日数
+    monthly        : 月ごとの待機人数（月内に1日でも待機していた人数）・待機入り・アサイン件数
+    """
+    now = timezone.now()
+    today = today or timezone.localdate()
+    bounds = _month_bounds(today, months)
+    range_start, range_end = bounds[0][0], bounds[-1][1]
+
+    duration = ExpressionWrapper(F('ended_at') - F('started_at'), output_field=DurationField())
+    waiting = EngineerStatusHistory.objects.filter(status=WAITING)
+
+    closed = waiting.filter(ended_at__gte=range_start, ended_at__lt=range_end)
+    followed_by_assign = EngineerStatusHistory.objects.filter(
+        engineer=OuterRef('engineer'), status=ASSIGNED, started_at=OuterRef('ended_at'),
+    )
+    closed_stats = closed.aggregate(
+        count=Count('id'),
+        avg=Avg(duration),
+        max=Max(duration),
+        assigned=Count('id', filter=Exists(followed_by_assign)),
+        assign_avg=Avg(duration, filter=Exists(followed_by_assign)),
+    )
+    open_stats = waiting.filter(ended_at__isnull=True).aggregate(
+        count=Count('id'),
+        avg=Avg(ExpressionWrapper(now - F('started_at'), output_field=DurationField())),
+    )
+
+    # 月ごとの集計（条件付き集計で1クエリ）。期間が範囲と重なる行だけをインデックスで絞り込む
+    overlapping = EngineerStatusHistory.objects.filter(
+        Q(ended_at__isnull=True) | Q(ended_at__gt=range_start),
+        status__in=(WAITING, ASSIGNED), started_at__lt=range_end,
+    )
+    aggs = {}
+    for i, (start, end) in enumerate(bounds):
+        in_month = Q(started_at__lt=end) & (Q(ended_at__isnull=True) | Q(ended_at__gt=start))
+        aggs[f'waiting_{i}'] = Count('engineer', filter=in_month & Q(status=WAITING), distinct=True)
+        aggs[f'entered_{i}'] = Count('id', filter=Q(status=WAITING, started_at__gte=start, started_at__lt=end))
+        aggs[f'assigned_{i}'] = Count('id', filter=Q(status=ASSIGNED, started_at__gte=start, started_at__lt=end))
+    monthly_stats = overlapping.aggregate(**aggs)
+
+    return {
+        'range': {'from': range_start.date(), 'to': (range_end - timedelta(days=1)).date()},
+        'bench_time': {
+            'closed_periods': closed_stats['count'],
+            'avg_days': _days(closed_stats['avg']),
+            'max_days': _days(closed_stats['max']),
+            'currently_waiting': open_stats['count'],
+            'current_avg_days': _days(open_stats['avg']),
+        },
+        'time_to_assign': {
+            'count': closed_stats['assigned'],
+            'avg_days': _days(closed_stats['assign_avg']),
+        },
+        'monthly': [
+            {
+                'month': start.strftime('%Y-%m'),
+                'waiting_headcount': monthly_stats[f'waiting_{i}'],
+                'entered_waiting': monthly_stats[f'entered_{i}'],
+                'assigned': monthly_stats[f'assigned_{i}'],
+            }
+            for i, (start, _) in enumerate(bounds)
+        ],
+    }
@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Company, CompanyAppointment, Engineer, PartnerEngineer, ProdiaUser
+
+
+class SkillFilterIndexTests(TestCase):
+    """?skills= の絞り込みが skills の GIN インデックスを使うこと"""
+
+    def explain(self, queryset):
+        # 件数の少ないテストDBではシーケンシャルスキャンが選ばれるため無効化し、
+        # 既定の並び順（updated_at のインデックス）を外して絞り込み条件の計画だけを確認する
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.order_by().explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.explain(queryset)
+        self.assertIn('Bitmap Index Scan', plan)
+        self.assertIn(index_name, plan)
+
+    def test_engineer_contains_uses_gin_index(self):
+        self.assertUsesIndex(Engineer.objects.filter(skills__contains=['Python', 'AWS']), 'engineer_skills_gin')
+
+    def test_engineer_has_any_keys_uses_gin_index(self):
+        self.assertUsesIndex(Engineer.objects.filter(skills__has_any_keys=['Python', 'AWS']), 'engineer_skills_gin')
+
+    def test_partner_contains_uses_gin_index(self):
+        self.assertUsesIndex(PartnerEngineer.objects.filter(skills__contains=['Python', 'AWS']), 'partner_skills_gin')
+
+    def test_partner_has_any_keys_uses_gin_index(self):
+        self.assertUsesIndex(
+            PartnerEngineer.objects.filter(skills__has_any_keys=['Python', 'AWS']), 'partner_skills_gin')
+
+
+class SkillFilterActionTests(TestCase):
+    """?skills= は一覧のみを絞り込み、詳細取得には影響しない"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = ProdiaUser.objects.create(name='テスト', email='test@example.com')
+        cls.python = Engineer.objects.create(
+            name='Python担当', skills=['Python', 'AWS'], engineer_status='active', phase=[])
+        cls.java = Engineer.objects.create(name='Java担当', skills=['Java'], engineer_status='active', phase=[])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_filtered(self):
+        response = self.client.get('/api/engineers/', {'skills': 'Python,AWS'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [self.python.id])
+
+    def test_list_match_any(self):
+        response = self.client.get('/api/engineers/', {'skills': 'Java,Go', 'match': 'any'})
+        self.assertEqual([row['id'] for row in response.data], [self.java.id])
+
+    def test_retrieve_is_not_filtered(self):
+        response = self.client.get(f'/api/engineers/{self.java.id}/', {'skills': 'Python'})
+        self.assertEqual(response.status_code, 200)
+
+
+class CompanyListQueryTests(TestCase):
+    """企業一覧は企業数に関わらず一定のクエリ数（企業 + 予定中アポの prefetch）で返す"""
+
+    @classmethod
+    def setUpTestData(cls):
+        start = date(2026, 1, 5)
+        for i in range(5):
+            company = Company.objects.create(name=f'株式会社テスト{i}')
+            CompanyAppointment.objects.create(
+                company=company, planner='過去', appointment_date=start, status='completed')
+            for days in (14, 7):
+                CompanyAppointment.objects.create(
+                    company=company, planner=f'予定{days}', appointment_date=start + timedelta(days=days))
+
+    def test_list_query_count(self):
+        with self.assertNumQueries(2):
+            response = APIClient().get('/api/companies/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+        # 予定中のうち日程の最も早いアポイント
+        self.assertEqual({row['active_appointment']['planner'] for row in response.data}, {'予定7'})
@@ -17,6 +17,10 @@ from .views import (
     BPProspectViewSet,
     CalendarEventViewSet,
     ActivityLogViewSet,
+    RevenueForecastViewSet,
+    MonthlyRevenueSummaryViewSet,
+    utilization_summary_view,
+    contract_expiry_alerts_view,
     health_check,
 )
 from . import calendar_views
@@ -41,6 +45,8 @@ router.register(r'pp-interviews', PPInterviewViewSet)
 router.register(r'bp-prospects', BPProspectViewSet)
 router.register(r'calendar-events', CalendarEventViewSet)
 router.register(r'activity-logs', ActivityLogViewSet)
+router.register(r'revenue-forecasts', RevenueForecastViewSet)
+router.register(r'revenue-summaries', MonthlyRevenueSummaryViewSet)
 
 urlpatterns = router.urls + [
     path('auth/login/', login_view, name='login'),
@@ -68,6 +74,10 @@ urlpatterns = router.urls + [
     path('calendar/events/<str:event_id>/update/', calendar_views.update_event, name='calendar_update_event'),
     path('calendar/events/<str:event_id>/delete/', calendar_views.delete_event, name='calendar_delete_event'),
 
+    # 稼働率ダッシュボード集計API
+    path('utilization/summary/', utilization_summary_view, name='utilization_summary'),
+    path('alerts/contract-expiry/', contract_expiry_alerts_view, name='contract_expiry_alerts'),
+
     #ヘルスチェック用
     path('health/', health_check, name='health'),
 ]
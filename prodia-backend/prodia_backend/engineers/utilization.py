@@ -0,0 +1,313 @@
+"""
+稼働率ダッシュボード集計
+
+IDR（Engineer）と BP（PartnerEngineer）の稼働状況・売上・契約終了アラートを
+条件付き集計（COUNT/SUM ... FILTER）でまとめて算出する。
+フロント（UtilizationDashboard.jsx）の集計ロジックと同じ基準で計算する。
+月次プロジェクトレポート（MonthlyProjectReport）の件数算出・スナップショットもここで行う。
+"""
+import calendar
+from datetime import timedelta
+
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Max, Q, Sum
+from django.utils import timezone
+
+from .models import Engineer, MonthlyProjectReport, PartnerEngineer
+
+IDR_ASSIGNED = 'アサイン済'
+IDR_WAITING = '未アサイン'
+
+BP_ACTIVE_STATUSES = ('active', 'upcoming')
+
+CRITICAL_DAYS = 14
+WARNING_DAYS = 30
+EXTENSION_CHECK_LEAD_DAYS = 14
+# 契約終了アラートで指定できる日数の上限（date の範囲を超えないように）
+MAX_ALERT_DAYS = 3650
+
+
+def _minus_one_month(d):
+    """1ヶ月前の同日（存在しない日は月末に丸める）"""
+    year, month = (d.year, d.month - 1) if d.month > 1 else (d.year - 1, 12)
+    return d.replace(year=year, month=month, day=min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def extension_check_date(end_date):
+    """延長確認日：契約終了1ヶ月前の日が属する週の月曜日（土日は翌月曜）"""
+    base = _minus_one_month(end_date)
+    weekday = base.weekday()  # 0=月 ... 6=日
+    if weekday == 5:
+        return base + timedelta(days=2)
+    if weekday == 6:
+        return base + timedelta(days=1)
+    return base - timedelta(days=weekday)
+
+
+def extension_alert(end_date, today):
+    """延長確認アラート対象なら {check_date, days_to_check, days_to_end} を返す"""
+    if end_date is None:
+        return None
+    days_to_end = (end_date - today).days
+    if days_to_end <= 0:
+        return None
+    check = extension_check_date(end_date)
+    days_to_check = (check - today).days
+    if days_to_check > EXTENSION_CHECK_LEAD_DAYS:
+        return None
+    return {'check_date': check, 'days_to_check': days_to_check, 'days_to_end': days_to_end}
+
+
+def extension_candidate_range(today):
+    """延長確認アラートになり得る終了日の範囲（インデックス範囲検索用の上限を広めに取る）"""
+    upper = today + timedelta(days=EXTENSION_CHECK_LEAD_DAYS + 31 + 2)
+    return today + timedelta(days=1), upper
+
+
+def _expiry_filters(date_field, today):
+    critical_until = today + timedelta(days=CRITICAL_DAYS)
+    warning_until = today + timedelta(days=WARNING_DAYS)
+    return {
+        'critical': Q(**{f'{date_field}__lte': critical_until}),
+        'warning': Q(**{f'{date_field}__gt': critical_until, f'{date_field}__lte': warning_until}),
+    }
+
+
+def _count_extension_alerts(queryset, date_field, today):
+    lower, upper = extension_candidate_range(today)
+    end_dates = queryset.filter(
+        **{f'{date_field}__gte': lower, f'{date_field}__lte': upper}
+    ).values_list(date_field, flat=True)
+    return sum(1 for d in end_dates if extension_alert(d, today))
+
+
+def _rate(part, total):
+    return round(part / total * 100, 1) if total else 0
+
+
+def idr_summary(today):
+    expiry = _expiry_filters('project_end_date', today)
+    stats = Engineer.objects.aggregate(
+        total=Count('id'),
+        assigned=Count('id', filter=Q(engineer_status=IDR_ASSIGNED)),
+        waiting=Count('id', filter=Q(engineer_status=IDR_WAITING)),
+        total_revenue=Sum('monthly_rate', filter=Q(engineer_status=IDR_ASSIGNED)),
+        critical=Count('id', filter=expiry['critical']),
+        warning=Count('id', filter=expiry['warning']),
+        last_updated_at=Max('updated_at'),
+    )
+    return {
+        'total': stats['total'],
+        'assigned': stats['assigned'],
+        'waiting': stats['waiting'],
+        'utilization_rate': _rate(stats['assigned'], stats['total']),
+        'total_revenue': int(stats['total_revenue'] or 0),
+        'expiring': {'critical': stats['critical'], 'warning': stats['warning']},
+        'extension_alerts': _count_extension_alerts(Engineer.objects.all(), 'project_end_date', today),
+        'last_updated_at': stats['last_updated_at'],
+    }
+
+
+def bp_summary(today):
+    expiry = _expiry_filters('contract_end', today)
+    priced = Q(client_unit_price__isnull=False, partner_unit_price__isnull=False)
+    gross = F('client_unit_price') - F('partner_unit_price')
+    gross_rate = ExpressionWrapper(gross * 100.0 / F('client_unit_price'), output_field=FloatField())
+    stats = PartnerEngineer.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        free=Count('id', filter=Q(status='free')),
+        total_gross=Sum(gross, filter=priced & Q(status='active')),
+        avg_gross_rate=Avg(gross_rate, filter=priced & Q(client_unit_price__gt=0)),
+        critical=Count('id', filter=expiry['critical']),
+        warning=Count('id', filter=expiry['warning']),
+        last_updated_at=Max('updated_at'),
+    )
+    return {
+        'total': stats['total'],
+        'active': stats['active'],
+        'free': stats['free'],
+        'utilization_rate': _rate(stats['active'], stats['total']),
+        'total_gross': int(stats['total_gross'] or 0),
+        'avg_gross_rate': round(stats['avg_gross_rate'] or 0, 1),
+        'expiring': {'critical': stats['critical'], 'warning': stats['warning']},
+        'extension_alerts': _count_extension_alerts(PartnerEngineer.objects.all(), 'contract_end', today),
+        'last_updated_at': stats['last_updated_at'],
+    }
+
+
+def build_utilization_summary(today=None):
+    """稼働率ダッシュボード用サマリー"""
+    today = today or timezone.localdate()
+    idr = idr_summary(today)
+    bp = bp_summary(today)
+    return {
+        'date': today.isoformat(),
+        'idr': idr,
+        'bp': bp,
+        'combined': {
+            'critical': idr['expiring']['critical'] + bp['expiring']['critical'],
+            'warning': idr['expiring']['warning'] + bp['expiring']['warning'],
+            'extension_alerts': idr['extension_alerts'] + bp['extension_alerts'],
+        },
+    }
+
+
+def urgency_bucket(days_left):
+    if days_left < 0:
+        return 'expired'
+    if days_left <= CRITICAL_DAYS:
+        return 'critical'
+    if days_left <= WARNING_DAYS:
+        return 'warning'
+    return 'upcoming'
+
+
+def _expiry_items(kind, queryset, date_field, fields, lower, upper, today):
+    rows = queryset.filter(
+        **{f'{date_field}__gte': lower, f'{date_field}__lte': upper}
+    ).order_by(date_field).values(*fields)
+    items = []
+    for row in rows:
+        end_date = row.pop(date_field)
+        days_left = (end_date - today).days
+        ext = extension_alert(end_date, today)
+        items.append({
+            'type': kind,
+            **row,
+            'end_date': end_date,
+            'days_left': days_left,
+            'urgency': urgency_bucket(days_left),
+            'extension_check': ext,
+        })
+    return items
+
+
+def _bucket_counts(items):
+    counts = {'expired': 0, 'critical': 0, 'warning': 0, 'upcoming': 0}
+    for item in items:
+        counts[item['urgency']] += 1
+    counts['total'] = len(items)
+    return counts
+
+
+def contract_expiry_alerts(within_days=WARNING_DAYS, expired_days=WARNING_DAYS, today=None):
+    """
+    契約終了が近い IDR / BP の一覧と緊急度別件数
+    終了日カラムのインデックス範囲検索（today - expired_days 〜 today + within_days）で抽出する。
+    """
+    today = today or timezone.localdate()
+    lower = today - timedelta(days=expired_days)
+    upper = today + timedelta(days=within_days)
+    idr_items = _expiry_items(
+        'idr', Engineer.objects.all(), 'project_end_date',
+        ('id', 'name', 'planner', 'engineer_status', 'client_company', 'project_name',
+         'project_end_date', 'contract_extended_at'),
+        lower, upper, today,
+    )
+    bp_items = _expiry_items(
+        'bp', PartnerEngineer.objects.all(), 'contract_end',
+        ('id', 'name', 'planner', 'status', 'partner_company', 'project_name',
+         'extension_possibility', 'contract_end', 'contract_extended_at'),
+        lower, upper, today,
+    )
+    items = sorted(idr_items + bp_items, key=lambda item: item['days_left'])
+    return {
+        'date': today.isoformat(),
+        'within_days': within_days,
+        'counts': _bucket_counts(items),
+        'idr_counts': _bucket_counts(idr_items),
+        'bp_counts': _bucket_counts(bp_items),
+        'items': items,
+    }
+
+
+# ── 月次プロジェクトレポート ──
+
+def _year_month(d):
+    return d.strftime('%Y-%m')
+
+
+def _month_starts(today, months_back):
+    """today の月から months_back ヶ月前までの月初日（古い順）"""
+    first = today.replace(day=1)
+    starts = []
+    for _ in range(months_back):
+        first = (first - timedelta(days=1)).replace(day=1)
+        starts.append(first)
+    return starts[::-1]
+
+
+def current_project_counts():
+    """今月の稼働件数（IDR: アサイン済 / BP: active・upcoming）"""
+    idr_count = Engineer.objects.aggregate(n=Count('id', filter=Q(engineer_status=IDR_ASSIGNED)))['n']
+    bp_count = PartnerEngineer.objects.filter(status__in=BP_ACTIVE_STATUSES).count()
+    return {'idr_count': idr_count, 'bp_count': bp_count, 'total_count': idr_count + bp_count}
+
+
+def historical_project_counts(month_starts):
+    """
+    過去月の稼働件数を月末時点の参画期間（IDR: project_start/end_date, BP: contract_start/end）から算出
+    月ごとの条件付き集計で、IDR・BP それぞれ1クエリ
+    """
+    idr_aggs, bp_aggs = {}, {}
+    for start in month_starts:
+        month_end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        key = start.strftime('m%Y%m')
+        idr_aggs[key] = Count('id', filter=Q(project_start_date__lte=month_end) & (
+            Q(project_end_date__isnull=True) | Q(project_end_date__gte=month_end)))
+        bp_aggs[key] = Count('id', filter=Q(contract_start__lte=month_end) & (
+            Q(contract_end__isnull=True) | Q(contract_end__gte=month_end)))
+    idr = Engineer.objects.aggregate(**idr_aggs) if idr_aggs else {}
+    bp = PartnerEngineer.objects.aggregate(**bp_aggs) if bp_aggs else {}
+    return {
+        _year_month(start): {
+            'idr_count': idr[start.strftime('m%Y%m')],
+            'bp_count': bp[start.strftime('m%Y%m')],
+        }
+        for start in month_starts
+    }
+
+
+def snapshot_monthly_reports(today=None, backfill_months=0):
+    """
+    月次プロジェクトレポートのスナップショット（日次・月替わりの定期実行用）
+
+    - 今月の行を作成し、自動算出（is_auto）かつ未確定なら最新件数で更新
+    - 前月以前の未確定行を確定（locked）
+    - backfill_months > 0 なら、行の無い過去月を参画期間の履歴から算出して確定済みで作成
+    返り値: {'current': 今月の行, 'locked': 確定した件数, 'backfilled': 作成した件数}
+    """
+    today = today or timezone.localdate()
+    current_ym = _year_month(today)
+
+    counts = current_project_counts()
+    report, created = MonthlyProjectReport.objects.get_or_create(
+        year_month=current_ym,
+        defaults={'idr_count': counts['idr_count'], 'bp_count': counts['bp_count'], 'is_auto': True},
+    )
+    if not created and report.is_auto and not report.locked:
+        report.idr_count = counts['idr_count']
+        report.bp_count = counts['bp_count']
+        report.save()
+
+    locked = MonthlyProjectReport.objects.filter(year_month__lt=current_ym, locked=False).update(locked=True)
+
+    backfilled = 0
+    if backfill_months > 0:
+        starts = _month_starts(today, backfill_months)
+        existing = set(MonthlyProjectReport.objects.filter(
+            year_month__in=[_year_month(s) for s in starts]).values_list('year_month', flat=True))
+        missing = [s for s in starts if _year_month(s) not in existing]
+        history = historical_project_counts(missing)
+        rows = [
+            MonthlyProjectReport(
+                year_month=ym, idr_count=c['idr_count'], bp_count=c['bp_count'],
+                total_count=c['idr_count'] + c['bp_count'], is_auto=True, locked=True,
+                note='参画期間の履歴から自動算出',
+            )
+            for ym, c in history.items()
+        ]
+        MonthlyProjectReport.objects.bulk_create(rows, ignore_conflicts=True)
+        backfilled = len(rows)
+
+    return {'current': report, 'locked': locked, 'backfilled': backfilled}
@@ -2,17 +2,21 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.sessions.models import Session
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
-from .models import Engineer, SkillSheet, SalesMemo, MemoAttachment, ProdiaUser, Interview, RecruitmentChannel, SocialMediaPost, Company, CompanyAppointment, Deal, DealActivity, Project, ProjectAssignment, PartnerEngineer, TeleapoRecord, MonthlyProjectReport, PPInterview, BPProspect, CalendarEvent, ActivityLog
+from .models import Engineer, SkillSheet, SalesMemo, MemoAttachment, ProdiaUser, Interview, RecruitmentChannel, SocialMediaPost, Company, CompanyAppointment, Deal, DealActivity, Project, ProjectAssignment, PartnerEngineer, TeleapoRecord, MonthlyProjectReport, PPInterview, BPProspect, CalendarEvent, ActivityLog, RevenueForecast, MonthlyRevenueSummary, EngineerStatusHistory
 from .serializers import (
     EngineerSerializer, 
+    EngineerImportSerializer,
     SkillSheetSerializer, 
     SalesMemoSerializer, 
     MemoAttachmentSerializer,
@@ -24,19 +28,27 @@ from .serializers import (
     CompanyAppointmentSerializer,
     DealSerializer,
     DealActivitySerializer,
+    DealCardSerializer,
     ProjectSerializer,
     ProjectAssignmentSerializer,
 )
 
-from .serializers import PartnerEngineerSerializer, TeleapoRecordSerializer, MonthlyProjectReportSerializer, PPInterviewSerializer, BPProspectSerializer, CalendarEventSerializer, ActivityLogSerializer
+from .serializers import PartnerEngineerSerializer, TeleapoRecordSerializer, MonthlyProjectReportSerializer, PPInterviewSerializer, BPProspectSerializer, CalendarEventSerializer, ActivityLogSerializer, RevenueForecastSerializer, MonthlyRevenueSummarySerializer
 from django.http import JsonResponse
+from .mixins import SparseFieldsetMixin, DeltaSyncMixin, StreamingExportMixin, SkillFilterMixin
+from .pagination import ActivityCursorPagination, OptionalCursorPagination, OptionalPageNumberPagination
+from .search import fuzzy_search
+from .recruitment import BUCKETS, applied_between, channel_statistics, funnel_series, parse_day
+from .status_history import open_histories, record_status_change, waiting_analytics
 
 def health_check(request):
     return JsonResponse({"status": "ok"})
 
-class EngineerViewSet(viewsets.ModelViewSet):
+class EngineerViewSet(DeltaSyncMixin, StreamingExportMixin, SkillFilterMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Engineer.objects.all()
     serializer_class = EngineerSerializer
+    pagination_class = OptionalCursorPagination
+    export_filename = 'engineers'
 
     def _detect_extension(self, instance, new_end_date_str, date_field):
         """project_end_date が延長されたか検知"""
@@ -67,109 +79,164 @@ class EngineerViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         if extend:
             save_kwargs['contract_extended_at'] = timezone.now()
-        serializer.save(**save_kwargs)
+        with transaction.atomic():
+            previous_status = instance.engineer_status
+            engineer = serializer.save(**save_kwargs)
+            if engineer.engineer_status != previous_status:
+                record_status_change(engineer, engineer.engineer_status, save_kwargs['last_user_updated_at'])
         return Response(serializer.data)
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            engineer = serializer.save()
+            if engineer.engineer_status:
+                record_status_change(engineer, engineer.engineer_status)
+
+    @action(detail=True, methods=['get'], url_path='status-history')
+    def status_history(self, request, pk=None):
+        """ステータス遷移履歴"""
+        engineer = self.get_object()
+        history = engineer.status_history.order_by('started_at').values('status', 'started_at', 'ended_at')
+        return Response(list(history))
+
+    @action(detail=False, methods=['get'], url_path='status-analytics')
+    def status_analytics(self, request):
+        """待機期間・アサインまでの日数・月別待機人数（?months=12）"""
+        try:
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            return Response({'error': 'months は整数で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= months <= 60:
+            return Response({'error': 'months は1〜60で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(waiting_analytics(months=months))
+
     def partial_update(self, request, *args, **kwargs):
         kwargs['partial'] = True
         return self.update(request, *args, **kwargs)
 
+    # 一括INSERTのチャンクサイズ
+    BULK_CREATE_BATCH_SIZE = 500
+
+    @staticmethod
+    def _parse_list(value):
+        """スキル・フェーズ（カンマ区切り文字列、リスト、または空）をリストに正規化"""
+        if isinstance(value, str):
+            return [v.strip() for v in value.split(',') if v.strip()]
+        if isinstance(value, list):
+            return value
+        return []
+
     @action(detail=False, methods=['post'], url_path='bulk-create')
     def bulk_create(self, request):
-        """CSV一括登録API"""
+        """
+        CSV一括登録API
+        既存の名前・メールアドレスを一括取得してメモリ上で検証し、
+        月売上を計算したうえでチャンク単位の bulk_create で登録する。
+        """
         engineers_data = request.data.get('engineers', [])
         
         if not engineers_data:
             return Response({
                 'error': 'エンジニアデータが送信されていません'
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        created_engineers = []
+        if not isinstance(engineers_data, list):
+            return Response({
+                'error': 'engineers は配列で指定してください'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # 重複チェック用に既存の名前・メールアドレスを1クエリずつで取得（形式不正の行は後で行エラーにする）
+        rows = [d for d in engineers_data if isinstance(d, dict)]
+        names = {str(d.get('name') or '').strip() for d in rows}
+        emails = {str(d.get('email') or '').strip() for d in rows} - {''}
+        existing_names = set(Engineer.objects.filter(name__in=names).values_list('name', flat=True))
+        used_emails = set(Engineer.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        new_engineers = []
         errors = []
         skipped_count = 0
-        
+
+        for index, engineer_data in enumerate(engineers_data):
+            if not isinstance(engineer_data, dict):
+                errors.append(f'行 {index + 1}: 行データの形式が不正です')
+                continue
+            try:
+                # 重複チェック（名前：登録済み + 同一ファイル内の先行行）
+                name = engineer_data.get('name', '').strip()
+                if name in existing_names:
+                    skipped_count += 1
+                    continue
+
+                # データの前処理
+                processed_data = {
+                    'name': name,
+                    'email': engineer_data.get('email', '').strip() or None,
+                    'position': engineer_data.get('position', '').strip() or None,
+                    'project_name': engineer_data.get('project_name', '').strip(),
+                    'planner': engineer_data.get('planner', '').strip(),
+                    'engineer_status': engineer_data.get('engineer_status', 'unassigned').strip(),
+                    'client_company': engineer_data.get('client_company', '').strip() or None,
+                    'monthly_rate': engineer_data.get('monthly_rate', '').strip() or None,
+                    'project_start_date': engineer_data.get('project_start_date', '').strip() or None,
+                    'project_end_date': engineer_data.get('project_end_date', '').strip() or None,
+                    'project_location': engineer_data.get('project_location', '').strip() or None,
+                    'skills': self._parse_list(engineer_data.get('skills', [])),
+                    'phase': self._parse_list(engineer_data.get('phase', [])),
+                }
+
+                # バリデーション
+                if not processed_data['name']:
+                    errors.append(f'行 {index + 1}: 名前は必須です')
+                    continue
+
+                if not processed_data['project_name']:
+                    errors.append(f'行 {index + 1}: プロジェクト名は必須です')
+                    continue
+
+                if not processed_data['planner']:
+                    errors.append(f'行 {index + 1}: プランナーは必須です')
+                    continue
+
+                serializer = EngineerImportSerializer(data=processed_data)
+                if not serializer.is_valid():
+                    errors.append(f'行 {index + 1}: {serializer.errors}')
+                    continue
+
+                email = serializer.validated_data.get('email')
+                if email and email in used_emails:
+                    errors.append(f'行 {index + 1}: メールアドレス {email} は既に登録されています')
+                    continue
+
+                # bulk_create は save() を通らないため月売上をここで計算
+                engineer = Engineer(**serializer.validated_data)
+                engineer.monthly_revenue = engineer.calculate_monthly_revenue()
+                new_engineers.append(engineer)
+                existing_names.add(name)
+                if email:
+                    used_emails.add(email)
+
+            except Exception as e:
+                errors.append(f'行 {index + 1}: {str(e)}')
+
+        # エラーが多い場合は1件も登録しない
+        if len(errors) > len(engineers_data) / 2:
+            return Response({
+                'error': 'エラーが多すぎます',
+                'errors': errors,
+                'details': f'{len(errors)}個のエラーが発生しました'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             with transaction.atomic():
-                for index, engineer_data in enumerate(engineers_data):
-                    try:
-                        # 重複チェック（名前）
-                        if Engineer.objects.filter(name=engineer_data.get('name', '').strip()).exists():
-                            skipped_count += 1
-                            continue
-                        
-                        # データの前処理
-                        email_val = engineer_data.get('email', '').strip() or None
-                        monthly_rate_val = engineer_data.get('monthly_rate', '').strip() or None
-                        project_start_val = engineer_data.get('project_start_date', '').strip() or None
-                        project_end_val = engineer_data.get('project_end_date', '').strip() or None
-                        processed_data = {
-                            'name': engineer_data.get('name', '').strip(),
-                            'email': email_val,
-                            'position': engineer_data.get('position', '').strip() or None,
-                            'project_name': engineer_data.get('project_name', '').strip(),
-                            'planner': engineer_data.get('planner', '').strip(),
-                            'engineer_status': engineer_data.get('engineer_status', 'unassigned').strip(),
-                            'client_company': engineer_data.get('client_company', '').strip() or None,
-                            'monthly_rate': monthly_rate_val,
-                            'project_start_date': project_start_val,
-                            'project_end_date': project_end_val,
-                            'project_location': engineer_data.get('project_location', '').strip() or None,
-                        }
-                        
-                        # スキルの処理（文字列、リスト、または空）
-                        skills = engineer_data.get('skills', [])
-                        if isinstance(skills, str):
-                            if skills.strip():
-                                skills = [s.strip() for s in skills.split(',') if s.strip()]
-                            else:
-                                skills = []
-                        elif not isinstance(skills, list):
-                            skills = []
-                        processed_data['skills'] = skills
-                        
-                        # フェーズの処理（文字列、リスト、または空）
-                        phase = engineer_data.get('phase', [])
-                        if isinstance(phase, str):
-                            if phase.strip():
-                                phase = [p.strip() for p in phase.split(',') if p.strip()]
-                            else:
-                                phase = []
-                        elif not isinstance(phase, list):
-                            phase = []
-                        processed_data['phase'] = phase
-                        
-                        # バリデーション
-                        if not processed_data['name']:
-                            errors.append(f'行 {index + 1}: 名前は必須です')
-                            continue
-                            
-                        if not processed_data['project_name']:
-                            errors.append(f'行 {index + 1}: プロジェクト名は必須です')
-                            continue
-                            
-                        if not processed_data['planner']:
-                            errors.append(f'行 {index + 1}: プランナーは必須です')
-                            continue
-                        
-                        # エンジニア作成
-                        serializer = EngineerSerializer(data=processed_data)
-                        if serializer.is_valid():
-                            engineer = serializer.save()
-                            created_engineers.append(engineer)
-                        else:
-                            errors.append(f'行 {index + 1}: {serializer.errors}')
-                            
-                    except Exception as e:
-                        errors.append(f'行 {index + 1}: {str(e)}')
-                
-                # エラーが多い場合は全体をロールバック
-                if len(errors) > len(engineers_data) / 2:
-                    return Response({
-                        'error': 'エラーが多すぎます',
-                        'errors': errors,
-                        'details': f'{len(errors)}個のエラーが発生しました'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-        
+                Engineer.objects.bulk_create(new_engineers, batch_size=self.BULK_CREATE_BATCH_SIZE)
+                EngineerStatusHistory.objects.bulk_create(
+                    open_histories(new_engineers), batch_size=self.BULK_CREATE_BATCH_SIZE)
+                # bulk_create はシグナルを送らないため月次売上サマリーをまとめて再集計
+                from .revenue import ENGINEER_REVENUE_FIELDS, engineer_revenue_months, schedule_refresh
+                months = set()
+                for engineer in new_engineers:
+                    months |= engineer_revenue_months(
+                        {name: getattr(engineer, name) for name in ENGINEER_REVENUE_FIELDS})
+                schedule_refresh(months)
         except Exception as e:
             return Response({
                 'error': f'データベースエラー: {str(e)}'
@@ -178,10 +245,10 @@ class EngineerViewSet(viewsets.ModelViewSet):
         # 結果レスポンス
         response_data = {
             'success': True,
-            'created_count': len(created_engineers),
+            'created_count': len(new_engineers),
             'skipped_count': skipped_count,
             'error_count': len(errors),
-            'message': f'{len(created_engineers)}名のエンジニアを登録しました'
+            'message': f'{len(new_engineers)}名のエンジニアを登録しました'
         }
         
         if skipped_count > 0:
@@ -236,23 +303,44 @@ class SalesMemoViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(memos, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        タイトル・タグ・本文の全文検索（?q=、関連度順）
+        memo_type などの絞り込み条件も併用できる。?page= 指定時はページング、未指定時は上位50件。
+        各メモに rank と、一致箇所を <mark> で囲んだ title_highlight / snippet（HTML）を付ける。
+        """
+        from .memo_search import SNIPPET_LENGTH, highlight, search
+        query = request.query_params.get('q', '').strip()
+        memos = search(self.get_queryset(), query) if query else None
+        if memos is None:
+            return Response({'error': 'q パラメータが必要です'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = OptionalPageNumberPagination()
+        page = paginator.paginate_queryset(memos, request, view=self)
+        rows = page if page is not None else memos[:50]
+        data = [
+            {
+                **SalesMemoSerializer(memo).data,
+                'rank': round(memo.rank, 4),
+                'title_highlight': highlight(memo.title, query),
+                'snippet': highlight(memo.content, query, SNIPPET_LENGTH),
+            }
+            for memo in rows
+        ]
+        if page is not None:
+            return paginator.get_paginated_response(data)
+        return Response(data)
+
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
-        """営業ダッシュボード用のメモ統計情報"""
-        total_memos = SalesMemo.objects.count()
-        pending_tasks = SalesMemo.objects.filter(is_completed=False, memo_type='task').count()
-        engineer_memos = SalesMemo.objects.filter(memo_type='engineer').count()
-        urgent_memos = SalesMemo.objects.filter(priority='urgent', is_completed=False).count()
-        
-        return Response({
-            'total_memos': total_memos,
-            'pending_tasks': pending_tasks,
-            'engineer_memos': engineer_memos,
-            'urgent_memos': urgent_memos,
-            'recent_memos': SalesMemoSerializer(
-                SalesMemo.objects.order_by('-updated_at')[:5], many=True
-            ).data
-        })
+        """
+        営業ダッシュボード用のメモ統計情報
+        件数（全体・作成者別・エンジニア別、期限切れを含む）は1クエリで集計する
+        """
+        from .memo_stats import dashboard
+
+        return Response(dashboard(lambda memos: SalesMemoSerializer(memos, many=True).data))
 
 
 # メモ添付ファイル用ViewSet
@@ -662,47 +750,34 @@ class RecruitmentChannelViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(channel=channel)
         if status:
             queryset = queryset.filter(status=status)
-        if date_from:
-            queryset = queryset.filter(applied_at__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(applied_at__date__lte=date_to)
+        if date_from or date_to:
+            queryset = applied_between(queryset, parse_day(date_from), parse_day(date_to))
             
         return queryset
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """採用経路別統計データ"""
-        queryset = self.get_queryset()
-        
-        # 全体統計
-        total_applications = queryset.count()
-        hired_count = queryset.filter(status='hired').count()
-        hiring_rate = (hired_count / total_applications * 100) if total_applications > 0 else 0
-        
-        # 採用経路別統計
-        channel_stats = {}
-        for choice in RecruitmentChannel.CHANNEL_CHOICES:
-            channel_code = choice[0]
-            channel_applications = queryset.filter(channel=channel_code)
-            channel_hired = channel_applications.filter(status='hired').count()
-            channel_total = channel_applications.count()
-            channel_rate = (channel_hired / channel_total * 100) if channel_total > 0 else 0
-            
-            channel_stats[channel_code] = {
-                'name': choice[1],
-                'total_applications': channel_total,
-                'hired_count': channel_hired,
-                'hiring_rate': round(channel_rate, 1)
-            }
-        
-        return Response({
-            'overall': {
-                'total_applications': total_applications,
-                'hired_count': hired_count,
-                'hiring_rate': round(hiring_rate, 1)
-            },
-            'by_channel': channel_stats
-        })
+        """
+        採用経路別統計データ
+        ?bucket=week|month を指定すると applied_at の週・月ごとのファネル推移（series）も返す。
+        期間は date_from〜date_to（未指定時は直近1年〜今日）。
+        """
+        data = channel_statistics(self.get_queryset())
+
+        bucket = request.query_params.get('bucket')
+        if bucket:
+            if bucket not in BUCKETS:
+                return Response({'error': 'bucket は week または month で指定してください'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            start = parse_day(request.query_params.get('date_from'))
+            end = parse_day(request.query_params.get('date_to'))
+            if start and end and start > end:
+                return Response({'error': 'date_from は date_to 以前の日付を指定してください'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            data['bucket'] = bucket
+            data['series'] = funnel_series(self.get_queryset(), bucket, start, end)
+
+        return Response(data)
 
 
 # SNS投稿管理ViewSet  
@@ -722,46 +797,92 @@ class SocialMediaPostViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def analytics(self, request):
-        """SNS投稿分析データ"""
-        queryset = self.get_queryset()
-        
-        # 全体統計
-        total_posts = queryset.count()
-        total_views = sum(post.views_count for post in queryset)
-        total_likes = sum(post.likes_count for post in queryset)
-        total_comments = sum(post.comments_count for post in queryset)
-        total_shares = sum(post.shares_count for post in queryset)
-        
-        # 平均エンゲージメント率
-        avg_engagement = sum(float(post.engagement_rate) for post in queryset) / total_posts if total_posts > 0 else 0
-        
-        # プラットフォーム別統計
-        platform_stats = {}
-        for choice in SocialMediaPost.PLATFORM_CHOICES:
-            platform_code = choice[0]
-            platform_posts = queryset.filter(platform=platform_code)
-            platform_count = platform_posts.count()
-            
-            if platform_count > 0:
-                platform_stats[platform_code] = {
-                    'name': choice[1],
-                    'posts_count': platform_count,
-                    'total_views': sum(p.views_count for p in platform_posts),
-                    'total_likes': sum(p.likes_count for p in platform_posts),
-                    'avg_engagement': sum(float(p.engagement_rate) for p in platform_posts) / platform_count
-                }
-        
-        return Response({
-            'overall': {
-                'total_posts': total_posts,
-                'total_views': total_views,
-                'total_likes': total_likes,
-                'total_comments': total_comments,
-                'total_shares': total_shares,
-                'avg_engagement_rate': round(avg_engagement, 2)
-            },
-            'by_platform': platform_stats
-        })
+        """SNS投稿分析データ（全体・プラットフォーム別の合計と平均エンゲージメント率）"""
+        from .sns_stats import platform_totals
+        return Response(platform_totals(self.get_queryset()))
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        """
+        日別・プラットフォーム別の推移（?date_from=&date_to=&platform=、既定は直近90日）
+        日別集計テーブルから返すため投稿件数に依存しない
+        """
+        from datetime import timedelta
+        from .sns_stats import DEFAULT_DAILY_DAYS, daily_series
+        end = parse_day(request.query_params.get('date_to')) or timezone.localdate()
+        start = parse_day(request.query_params.get('date_from')) or end - timedelta(days=DEFAULT_DAILY_DAYS - 1)
+        if start > end:
+            return Response({'error': 'date_from は date_to 以前の日付を指定してください'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(daily_series(start, end, request.query_params.get('platform')))
+
+    # 指標スナップショットの一括登録の上限件数
+    MAX_INGEST_ITEMS = 5000
+
+    @action(detail=False, methods=['post'], url_path='ingest-metrics')
+    def ingest_metrics(self, request):
+        """
+        同期処理で取得した指標の一括登録（{"items": [{post_id, captured_at, likes_count, ...}]}）
+        スナップショットとして追記し、各投稿の現在値は最新の指標で更新する
+        """
+        from .serializers import SocialMetricIngestSerializer
+        from .sns_snapshots import ingest
+        items = request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'items（配列）が必要です'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_INGEST_ITEMS:
+            return Response({'error': f'items は{self.MAX_INGEST_ITEMS}件以下で指定してください'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = SocialMetricIngestSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        received, unknown = ingest(serializer.validated_data)
+        return Response({'received': received, 'unknown_post_ids': unknown})
+
+    def _metrics_range(self, request, allowed_intervals):
+        """?date_from=&date_to=&interval= を (start, end, interval) に変換（不正な場合はエラーの Response）"""
+        from datetime import datetime, time, timedelta
+        from .sns_snapshots import MAX_POINTS, bucket_count
+        interval = request.query_params.get('interval', 'day')
+        if interval not in allowed_intervals:
+            return Response({'error': f"interval は {' / '.join(allowed_intervals)} で指定してください"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end_date = parse_day(request.query_params.get('date_to')) or timezone.localdate()
+            start_date = parse_day(request.query_params.get('date_from')) or end_date - timedelta(days=29)
+            tz = timezone.get_current_timezone()
+            start = datetime.combine(start_date, time.min, tzinfo=tz)
+            end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz)
+        except OverflowError:
+            return Response({'error': 'date_from / date_to が範囲外です'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'error': 'date_from は date_to 以前の日付を指定してください'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if bucket_count(start, end, interval) > MAX_POINTS:
+            return Response({'error': f'期間が長すぎます（{interval} 単位で{MAX_POINTS}区間まで）'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return start, end, interval
+
+    @action(detail=True, methods=['get'], url_path='metrics')
+    def post_metrics(self, request, pk=None):
+        """投稿の指標推移（?date_from=&date_to=、?interval=raw|hour|day、既定は直近30日・日単位）"""
+        from .sns_snapshots import post_series
+        parsed = self._metrics_range(request, ('raw', 'hour', 'day'))
+        if isinstance(parsed, Response):
+            return parsed
+        start, end, interval = parsed
+        post = self.get_object()
+        return Response({'post': post.id, 'interval': interval, 'series': post_series(post, start, end, interval)})
+
+    @action(detail=False, methods=['get'], url_path='metrics')
+    def platform_metrics(self, request):
+        """プラットフォーム別の指標合計の推移（?date_from=&date_to=&platform=、?interval=hour|day）"""
+        from .sns_snapshots import platform_series
+        parsed = self._metrics_range(request, ('hour', 'day'))
+        if isinstance(parsed, Response):
+            return parsed
+        start, end, interval = parsed
+        platform = request.query_params.get('platform')
+        return Response({'interval': interval, 'series': platform_series(start, end, interval, platform)})
 
 
 # ===============================
@@ -775,12 +896,34 @@ class CompanyViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        queryset = Company.objects.all()
+        # 予定中のアポイント（日程順の先頭1件）を企業ごとに1件だけ prefetch する
+        # ?name= は表記ゆれを吸収したあいまい検索（類似度の高い順）
+        scheduled = CompanyAppointment.objects.filter(status='scheduled').order_by(
+            'appointment_date', 'appointment_time')[:1]
+        queryset = Company.objects.prefetch_related(
+            Prefetch('appointments', queryset=scheduled, to_attr='scheduled_appointments'),
+        )
         name = self.request.query_params.get('name', None)
         if name:
-            queryset = queryset.filter(name__icontains=name)
+            queryset = fuzzy_search(queryset, 'search_name', name).order_by('-similarity', 'name')
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """企業名のあいまい検索（?q=、?limit= 既定20件・最大100件）。類似度の高い順に返す"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q パラメータが必要です'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit は整数で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = fuzzy_search(Company.objects.all(), 'search_name', query).order_by('-similarity', 'name')
+        return Response([
+            {'id': row['id'], 'name': row['name'], 'similarity': round(row['similarity'], 3)}
+            for row in rows.values('id', 'name', 'similarity')[:limit]
+        ])
+
     @action(detail=False, methods=['post'], url_path='bulk-create')
     def bulk_create(self, request):
         """企業名の一括登録"""
@@ -800,49 +943,50 @@ class CompanyViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='teleapo-status')
     def teleapo_status(self, request):
-        """企業ごとのテレアポ状況を返す（架電リスト用）"""
-        from collections import defaultdict
-
-        companies = Company.objects.all().order_by('name')
-
-        # TeleapoRecord を全件取得して company_name でグルーピング
-        all_records = list(
-            TeleapoRecord.objects.values(
-                'company_name', 'planner', 'call_date', 'result'
-            ).order_by('-call_date', '-created_at')
-        )
+        """
+        企業ごとのテレアポ状況を返す（架電リスト用）
 
-        call_data = defaultdict(list)
-        for r in all_records:
-            call_data[r['company_name']].append(r)
+        架電件数・最終架電（日付・結果・プランナー）・架電者一覧は企業ごとの相関サブクエリで、
+        検索（?search=、企業名のあいまい検索で類似度順）・架電有無（?status=all|uncalled|called）・ページング（?page=&page_size=）は
+        データベース側で行う。?page= 未指定時は従来どおり全件の配列を返す。
+        """
+        from django.contrib.postgres.aggregates import ArrayAgg
+
+        records = TeleapoRecord.objects.filter(company=OuterRef('pk')).order_by()
+        latest = records.order_by('-call_date', '-created_at')
+        companies = Company.objects.annotate(
+            call_count=Coalesce(Subquery(
+                records.values('company').annotate(c=Count('id')).values('c')), 0),
+            last_call_date=Subquery(latest.values('call_date')[:1]),
+            last_result=Subquery(latest.values('result')[:1]),
+            last_planner=Subquery(latest.values('planner')[:1]),
+            callers=Subquery(
+                records.values('company').annotate(
+                    a=ArrayAgg('planner', distinct=True, order_by='planner')).values('a')),
+        ).order_by('name')
 
-        result = []
         search = request.query_params.get('search', '').strip()
+        if search:
+            companies = fuzzy_search(companies, 'search_name', search).order_by('-similarity', 'name')
         status_filter = request.query_params.get('status', 'all')  # all / uncalled / called
+        if status_filter == 'uncalled':
+            companies = companies.filter(~Exists(records))
+        elif status_filter == 'called':
+            companies = companies.filter(Exists(records))
 
-        for company in companies:
-            if search and search.lower() not in company.name.lower():
-                continue
-
-            records = call_data.get(company.name, [])
-            call_count = len(records)
-
-            if status_filter == 'uncalled' and call_count > 0:
-                continue
-            if status_filter == 'called' and call_count == 0:
-                continue
-
-            result.append({
-                'id': company.id,
-                'name': company.name,
-                'call_count': call_count,
-                'last_call_date': str(records[0]['call_date']) if records else None,
-                'last_result': records[0]['result'] if records else None,
-                'last_planner': records[0]['planner'] if records else None,
-                'callers': list({r['planner'] for r in records}),
-            })
-
-        return Response(result)
+        rows = companies.values(
+            'id', 'name', 'call_count', 'last_call_date', 'last_result', 'last_planner', 'callers',
+        )
+        paginator = OptionalPageNumberPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        data = [
+            {**row, 'last_call_date': str(row['last_call_date']) if row['last_call_date'] else None,
+             'callers': row['callers'] or []}
+            for row in (page if page is not None else rows)
+        ]
+        if page is not None:
+            return paginator.get_paginated_response(data)
+        return Response(data)
 
 
 class CompanyAppointmentViewSet(viewsets.ModelViewSet):
@@ -929,14 +1073,23 @@ class CompanyAppointmentViewSet(viewsets.ModelViewSet):
 # 案件パイプライン（かんばんボード）
 # ===============================
 
-class DealViewSet(viewsets.ModelViewSet):
+class DealViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """案件パイプライン管理"""
-    queryset = Deal.objects.prefetch_related('proposed_engineers', 'activities').all()
+    queryset = Deal.objects.all()
     serializer_class = DealSerializer
     permission_classes = [AllowAny]
 
+    @staticmethod
+    def with_related(queryset):
+        """提案エンジニア名・最新の活動履歴（1件ずつ切り出し済み）・活動件数を付与"""
+        recent = DealActivity.objects.order_by('-created_at')[:DealSerializer.RECENT_ACTIVITY_COUNT]
+        return queryset.annotate(activity_count=Count('activities')).prefetch_related(
+            Prefetch('proposed_engineers', queryset=Engineer.objects.only('id', 'name')),
+            Prefetch('activities', queryset=recent, to_attr='recent_activities'),
+        )
+
     def get_queryset(self):
-        queryset = Deal.objects.prefetch_related('proposed_engineers', 'activities').all()
+        queryset = self.with_related(Deal.objects.all())
         stage = self.request.query_params.get('stage')
         assigned_to = self.request.query_params.get('assigned_to')
         if stage:
@@ -947,29 +1100,77 @@ class DealViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def pipeline(self, request):
-        """かんばんボード用：ステージ別案件一覧"""
-        stages = ['open_system', 'web', 'embedded', 'infrastructure', 'support_other', 'low_skill']
-        stage_labels = {
-            'open_system':    'オープン系',
-            'web':            'Web系',
-            'embedded':       '組み込み',
-            'infrastructure': 'インフラ',
-            'support_other':  '開発支援・その他',
-            'low_skill':      'ロースキル',
+        """
+        かんばんボード用：ステージ別案件一覧
+
+        案件は1クエリ（＋関連の prefetch）で取得し、ステージ別の件数・想定月額合計は GROUP BY 集計で算出する。
+        ?summary=1 の場合はカード表示用フィールドと活動履歴の件数のみ返す（活動履歴本体は含めない）。
+        ?assigned_to= で担当営業を絞り込む。
+        """
+        stage_labels = dict(Deal.STAGE_CHOICES)
+        summary = request.query_params.get('summary') in ('1', 'true')
+
+        deals = Deal.objects.filter(stage__in=stage_labels)
+        assigned_to = request.query_params.get('assigned_to')
+        if assigned_to:
+            deals = deals.filter(assigned_to=assigned_to)
+
+        totals = {
+            row['stage']: row
+            for row in deals.order_by().values('stage').annotate(
+                count=Count('id'), total_amount=Sum('expected_monthly_rate'))
         }
-        pipeline = {}
-        for s in stages:
-            deals = Deal.objects.prefetch_related('proposed_engineers', 'activities').filter(stage=s)
-            pipeline[s] = {
-                'label': stage_labels[s],
-                'deals': DealSerializer(deals, many=True).data,
-                'count': deals.count(),
-                'total_amount': sum(
-                    float(d.expected_monthly_rate or 0) for d in deals
-                ),
+
+        engineer_names = Prefetch('proposed_engineers', queryset=Engineer.objects.only('id', 'name'))
+        if summary:
+            deals = (deals.only(*DealCardSerializer.CARD_FIELDS)
+                     .annotate(activity_count=Count('activities'))
+                     .prefetch_related(engineer_names))
+            data = DealCardSerializer(deals, many=True).data
+        else:
+            data = DealSerializer(self.with_related(deals), many=True).data
+
+        pipeline = {
+            s: {
+                'label': label,
+                'deals': [],
+                'count': totals.get(s, {}).get('count', 0),
+                'total_amount': float(totals.get(s, {}).get('total_amount') or 0),
             }
+            for s, label in stage_labels.items()
+        }
+        for deal in data:
+            pipeline[deal['stage']]['deals'].append(deal)
         return Response(pipeline)
 
+    @action(detail=True, methods=['get'])
+    def candidates(self, request, pk=None):
+        """案件の必要スキル・参画予定日・想定単価に合う候補エンジニア（IDR / BP）のランキング（?limit= 既定20件・最大100件）"""
+        from .matching import rank_candidates_for_deal
+        deal = self.get_object()
+        kind = request.query_params.get('type')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        candidates = rank_candidates_for_deal(
+            deal, kind=kind if kind in ('idr', 'bp') else None, limit=limit,
+        )
+        return Response({
+            'deal_id': deal.id,
+            'required_skills': deal.required_skills,
+            'count': len(candidates),
+            'candidates': candidates,
+        })
+
+    @action(detail=True, methods=['get'])
+    def activities(self, request, pk=None):
+        """活動履歴（新しい順、カーソルページネーション ?cursor= / ?page_size=）"""
+        deal = self.get_object()
+        paginator = ActivityCursorPagination()
+        page = paginator.paginate_queryset(DealActivity.objects.filter(deal=deal), request, view=self)
+        return paginator.get_paginated_response(DealActivitySerializer(page, many=True).data)
+
     @action(detail=True, methods=['post'])
     def add_activity(self, request, pk=None):
         """案件に活動履歴を追加"""
@@ -1011,6 +1212,7 @@ class DealViewSet(viewsets.ModelViewSet):
             content=f'ステージを「{old_stage}」→「{new_stage}」に変更',
             created_by=request.data.get('updated_by', 'システム'),
         )
+        deal = self.with_related(Deal.objects.filter(pk=deal.pk)).get()
         return Response(DealSerializer(deal).data)
 
 
@@ -1020,29 +1222,44 @@ class DealViewSet(viewsets.ModelViewSet):
 
 class ProjectViewSet(viewsets.ModelViewSet):
     """元請案件管理"""
-    queryset = Project.objects.all().prefetch_related('assignments__engineer')
+    queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [AllowAny]
 
+    @staticmethod
+    def with_counts(queryset):
+        """参画人数を annotate し、参画情報＋エンジニアを1クエリで prefetch"""
+        return queryset.annotate(
+            engineer_count=Count('assignments'),
+            active_engineer_count=Count('assignments', filter=Q(assignments__is_active=True)),
+        ).prefetch_related(
+            Prefetch('assignments', queryset=ProjectAssignment.objects.select_related('engineer')),
+        )
+
+    def get_queryset(self):
+        return self.with_counts(super().get_queryset())
+
     @action(detail=False, methods=['get'])
     def by_client(self, request):
-        """元請企業別に案件をグルーピングして返す"""
-        projects = self.get_queryset()
+        """元請企業別に案件をグルーピングして返す（案件数に関わらず3クエリ）"""
+        totals = {
+            row['client_company']: row
+            for row in Project.objects.order_by().values('client_company').annotate(
+                total_engineers=Count('assignments'),
+                active_count=Count('id', filter=Q(status='active'), distinct=True),
+            )
+        }
         result = {}
-        for project in projects:
-            key = project.client_company
+        for project in ProjectSerializer(self.get_queryset(), many=True).data:
+            key = project['client_company']
             if key not in result:
                 result[key] = {
                     'client_company': key,
                     'projects': [],
-                    'total_engineers': 0,
-                    'active_count': 0,
+                    'total_engineers': totals[key]['total_engineers'],
+                    'active_count': totals[key]['active_count'],
                 }
-            serialized = ProjectSerializer(project).data
-            result[key]['projects'].append(serialized)
-            result[key]['total_engineers'] += project.assignments.count()
-            if project.status == 'active':
-                result[key]['active_count'] += 1
+            result[key]['projects'].append(project)
 
         return Response(list(result.values()))
 
@@ -1075,6 +1292,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                     setattr(assignment, field, request.data[field])
             assignment.save()
 
+        project = self.with_counts(Project.objects.filter(pk=project.pk)).get()
         return Response(ProjectSerializer(project).data)
 
     @action(detail=True, methods=['delete'], url_path=r'remove_assignment/(?P<assignment_id>[^/.]+)')
@@ -1086,6 +1304,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             assignment.delete()
         except ProjectAssignment.DoesNotExist:
             return Response({'error': 'Assignment not found'}, status=status.HTTP_404_NOT_FOUND)
+        project = self.with_counts(Project.objects.filter(pk=project.pk)).get()
         return Response(ProjectSerializer(project).data)
 
 
@@ -1095,10 +1314,11 @@ class ProjectAssignmentViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
 
-class PartnerEngineerViewSet(viewsets.ModelViewSet):
+class PartnerEngineerViewSet(DeltaSyncMixin, StreamingExportMixin, SkillFilterMixin, viewsets.ModelViewSet):
     queryset = PartnerEngineer.objects.all().order_by('-updated_at')
     serializer_class = PartnerEngineerSerializer
     permission_classes = [AllowAny]
+    export_filename = 'partner_engineers'
 
     def _detect_extension(self, instance, new_end_date_str):
         """contract_end が延長されたか検知"""
@@ -1129,27 +1349,73 @@ class PartnerEngineerViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
+# ===============================
+# 稼働率サマリー
+# ===============================
+
+@api_view(['GET'])
+def utilization_summary_view(request):
+    """稼働率ダッシュボード用の集計値（IDR / BP 件数・売上・契約終了アラート）"""
+    from .utilization import build_utilization_summary
+    return Response(build_utilization_summary())
+
+
+@api_view(['GET'])
+def contract_expiry_alerts_view(request):
+    """
+    契約終了アラート（IDR: project_end_date / BP: contract_end）
+
+    クエリパラメータ:
+      within_days  : 何日先までの終了を対象にするか（既定 30）
+      expired_days : 何日前までの終了済みを含めるか（既定 30）
+    """
+    from .utilization import MAX_ALERT_DAYS, contract_expiry_alerts
+    try:
+        within_days = int(request.query_params.get('within_days', 30))
+        expired_days = int(request.query_params.get('expired_days', 30))
+    except ValueError:
+        return Response({'error': 'within_days / expired_days は整数で指定してください'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not (0 <= within_days <= MAX_ALERT_DAYS and 0 <= expired_days <= MAX_ALERT_DAYS):
+        return Response({'error': f'within_days / expired_days は0〜{MAX_ALERT_DAYS}で指定してください'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response(contract_expiry_alerts(within_days=within_days, expired_days=expired_days))
+
+
 # ===============================
 # テレアポ記録 ViewSet
 # ===============================
 
-class TeleapoRecordViewSet(viewsets.ModelViewSet):
+class TeleapoRecordViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """テレアポ（架電）履歴管理"""
     queryset = TeleapoRecord.objects.all()
     serializer_class = TeleapoRecordSerializer
     permission_classes = [AllowAny]
+    export_filename = 'teleapo_records'
+
+    @staticmethod
+    def _company_id(value):
+        """?company_id= を整数に変換（未指定は None、不正な値は ValueError）"""
+        value = (value or '').strip()
+        return int(value) if value else None
 
     def get_queryset(self):
         qs = TeleapoRecord.objects.all()
         planner = self.request.query_params.get('planner')
         company = self.request.query_params.get('company')
+        try:
+            company_id = self._company_id(self.request.query_params.get('company_id'))
+        except ValueError:
+            raise ValidationError({'error': 'company_id は整数で指定してください'})
         date_from = self.request.query_params.get('date_from')
         date_to = self.request.query_params.get('date_to')
         result = self.request.query_params.get('result')
         if planner:
             qs = qs.filter(planner=planner)
         if company:
-            qs = qs.filter(company_name__icontains=company)
+            qs = fuzzy_search(qs, 'company_name_search', company)
+        if company_id is not None:
+            qs = qs.filter(company_id=company_id)
         if date_from:
             qs = qs.filter(call_date__gte=date_from)
         if date_to:
@@ -1172,6 +1438,10 @@ class TeleapoRecordViewSet(viewsets.ModelViewSet):
             company_obj, company_created = Company.objects.get_or_create(
                 name=record.company_name
             )
+            if record.company_id is None:
+                record.company = company_obj
+                record.save(update_fields=['company'])
+                response_data['company'] = company_obj.id
             _, apt_created = CompanyAppointment.objects.get_or_create(
                 company=company_obj,
                 planner=record.planner,
@@ -1188,13 +1458,20 @@ class TeleapoRecordViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def company_history(self, request):
-        """企業名で架電履歴を検索"""
+        """企業の架電履歴（?company_id= は企業マスターの紐付けで、?company= は企業名の部分一致で検索）"""
+        try:
+            company_id = self._company_id(request.query_params.get('company_id'))
+        except ValueError:
+            return Response({'error': 'company_id は整数で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
         company = request.query_params.get('company', '').strip()
-        if not company:
-            return Response({'error': 'company パラメータが必要です'}, status=status.HTTP_400_BAD_REQUEST)
-        records = TeleapoRecord.objects.filter(
-            company_name__icontains=company
-        ).order_by('-call_date', '-created_at')
+        if company_id is not None:
+            records = TeleapoRecord.objects.filter(company_id=company_id)
+        elif company:
+            records = fuzzy_search(TeleapoRecord.objects.all(), 'company_name_search', company)
+        else:
+            return Response({'error': 'company または company_id パラメータが必要です'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        records = records.order_by('-call_date', '-created_at')
         return Response(TeleapoRecordSerializer(records, many=True).data)
 
 
@@ -1208,42 +1485,50 @@ class MonthlyProjectReportViewSet(viewsets.ModelViewSet):
     serializer_class = MonthlyProjectReportSerializer
     permission_classes = [AllowAny]
 
+    def list(self, request, *args, **kwargs):
+        """
+        一覧（今月の自動算出行はサーバーで算出した最新件数で返す。書き込みは行わない）
+        月替わり後に定期実行（snapshot_monthly_reports）がまだ走っておらず今月の行が無い場合は、
+        保存されていない今月の行（id は null）を最新件数で先頭に加えて返す。
+        """
+        from .utilization import current_project_counts
+        current_ym = timezone.localdate().strftime('%Y-%m')
+        response = super().list(request, *args, **kwargs)
+        rows = response.data if isinstance(response.data, list) else response.data.get('results', [])
+        current = next((row for row in rows if row['year_month'] == current_ym), None)
+        if current is None:
+            placeholder = MonthlyProjectReport(year_month=current_ym, is_auto=True)
+            rows.insert(0, {**MonthlyProjectReportSerializer(placeholder).data, **current_project_counts()})
+        elif current['is_auto'] and not current['locked']:
+            current.update(current_project_counts())
+        return response
+
+    @action(detail=False, methods=['get'])
+    def current_counts(self, request):
+        """今月の稼働件数（IDR アサイン済 / BP active・upcoming）"""
+        from .utilization import current_project_counts
+        return Response(current_project_counts())
+
     @action(detail=False, methods=['post'])
     def ensure_current(self, request):
         """
-        今月のレコードが存在しなければ自動で作成して返す。
-        フロントが画面表示時に呼ぶ。
+        今月のレコードが存在しなければ作成して返す。
+        件数はサーバー側で算出する（リクエストの idr_count / bp_count は使用しない）。
         """
-        from datetime import date
-        ym = date.today().strftime('%Y-%m')
-        idr_count = int(request.data.get('idr_count', 0))
-        bp_count  = int(request.data.get('bp_count', 0))
-        report, created = MonthlyProjectReport.objects.get_or_create(
-            year_month=ym,
-            defaults={
-                'idr_count': idr_count,
-                'bp_count':  bp_count,
-                'is_auto':   True,
-                'locked':    False,
-            }
-        )
-        # 自動算出フラグが立っている場合は最新値で上書き
-        if not created and report.is_auto and not report.locked:
-            report.idr_count = idr_count
-            report.bp_count  = bp_count
-            report.save()
+        from .utilization import snapshot_monthly_reports
+        report = snapshot_monthly_reports()['current']
         return Response(MonthlyProjectReportSerializer(report).data,
                         status=status.HTTP_200_OK)
 
 
-class PPInterviewViewSet(viewsets.ModelViewSet):
+class PPInterviewViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """PP営業進捗 CRUD"""
     queryset = PPInterview.objects.all().order_by('-created_at')
     serializer_class = PPInterviewSerializer
     permission_classes = [AllowAny]
 
 
-class BPProspectViewSet(viewsets.ModelViewSet):
+class BPProspectViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """BP進捗管理 CRUD"""
     queryset = BPProspect.objects.all().order_by('-created_at')
     serializer_class = BPProspectSerializer
@@ -1278,3 +1563,90 @@ class ActivityLogViewSet(viewsets.ModelViewSet):
         """ログ全件削除"""
         ActivityLog.objects.all().delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RevenueForecastViewSet(viewsets.ReadOnlyModelViewSet):
+    """売上予測（モンテカルロシミュレーション結果）"""
+    queryset = RevenueForecast.objects.all()
+    serializer_class = RevenueForecastSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        forecast_type = self.request.query_params.get('forecast_type')
+        if forecast_type:
+            queryset = queryset.filter(forecast_type=forecast_type)
+        scenario = self.request.query_params.get('scenario')
+        if scenario:
+            queryset = queryset.filter(scenario=scenario)
+        return queryset
+
+    @action(detail=False, methods=['post'])
+    def run(self, request):
+        """
+        売上予測を再計算して保存する
+
+        パラメータ: months (1-36), simulations, continuation_rate (0-1),
+                    rate_increase, new_hires (12ヶ月あたり), seed
+        """
+        from .forecast import (
+            DEFAULT_MONTHS, DEFAULT_SIMULATIONS, MAX_MONTHS, MAX_SIMULATIONS, run_forecast,
+        )
+        data = request.data
+        try:
+            months = int(data.get('months', DEFAULT_MONTHS))
+            simulations = int(data.get('simulations', DEFAULT_SIMULATIONS))
+            continuation_rate = float(data.get('continuation_rate', 0.85))
+            rate_increase = float(data.get('rate_increase', 0))
+            new_hires = int(data.get('new_hires', 0))
+            seed = data.get('seed')
+            seed = int(seed) if seed not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'パラメータは数値で指定してください'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= months <= MAX_MONTHS and 1 <= simulations <= MAX_SIMULATIONS
+                and 0 <= continuation_rate <= 1 and -1 < rate_increase < 1 and new_hires >= 0):
+            return Response({'error': f'months は1〜{MAX_MONTHS}、simulations は1〜{MAX_SIMULATIONS}、'
+                                      'continuation_rate は0〜1で指定してください'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        created_by = request.user if isinstance(request.user, ProdiaUser) else ProdiaUser.objects.first()
+        if created_by is None:
+            return Response({'error': '作成者となるユーザーが存在しません'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        result = run_forecast(
+            created_by, months=months, simulations=simulations,
+            continuation_rate=continuation_rate, rate_increase=rate_increase,
+            new_hires=new_hires, seed=seed,
+        )
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class MonthlyRevenueSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    月次売上サマリー（Engineer / ProjectAssignment の変更時に該当月のみ再集計済み）
+
+    ?from=YYYY-MM&to=YYYY-MM で期間を絞り込む
+    """
+    queryset = MonthlyRevenueSummary.objects.all()
+    serializer_class = MonthlyRevenueSummarySerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        from datetime import date
+        queryset = super().get_queryset()
+        for param, lookup in (('from', 'year_month__gte'), ('to', 'year_month__lte')):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    year, month = (int(v) for v in value.split('-')[:2])
+                    queryset = queryset.filter(**{lookup: date(year, month, 1)})
+                except ValueError:
+                    pass
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        from .revenue import ensure_current_month
+        ensure_current_month()
+        return super().list(request, *args, **kwargs)